@@ -3,6 +3,21 @@ ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The Procfile serves the project through ASGI with uvicorn workers under
+gunicorn:
+
+    gunicorn backend.asgi:application -k uvicorn.workers.UvicornWorker
+
+or, without gunicorn, ``uvicorn backend.asgi:application --workers 4``.
+The sync DRF views keep working under ASGI; Django runs them in a thread,
+while the async endpoints under api/async/ hold many slow dashboard polls
+in one process. The server-sent events stream (api/async/events/) holds
+its connection open and answers 501 when served through WSGI
+(backend/wsgi.py, e.g. ``manage.py runserver``).
+
+With more than one worker, set WEB_CONCURRENCY, CACHE_URL and
+EVENT_BROKER=tasks.events.RedisBroker (see backend/settings.py).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -12,5 +27,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+# Sync views run on executor threads under ASGI, and a persistent connection
+# per thread is never reused or closed; see DB_CONN_MAX_AGE in settings
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
@@ -1,5 +1,8 @@
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -33,6 +36,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost, so its timings cover the rest of the stack
+    'tasks.instrumentation.RequestMetricsMiddleware',
+    'tasks.routing.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,12 +72,75 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Database profile, chosen by DATABASE_ENGINE (sqlite or postgres).
+# Connections are kept open for DB_CONN_MAX_AGE seconds and checked before
+# reuse instead of being opened on every request. Under ASGI each request may
+# run its queries on a different thread, so backend/asgi.py defaults it to 0
+# and only WSGI servers keep persistent connections by default.
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+DATABASE_ENGINE = os.environ.get('DATABASE_ENGINE', 'sqlite')
+
+if DATABASE_ENGINE == 'postgres':
+    # Needs the psycopg package (pip install "psycopg[binary]")
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'taskflow'),
+            'USER': os.environ.get('POSTGRES_USER', 'taskflow'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': 5,
+                # Abandon runaway queries instead of letting them hold a worker
+                'options': f"-c statement_timeout={os.environ.get('POSTGRES_STATEMENT_TIMEOUT_MS', '30000')}",
+            },
+        }
     }
-}
+elif DATABASE_ENGINE == 'sqlite':
+    # WAL lets readers run alongside the single writer, and busy_timeout makes
+    # a writer wait for the lock instead of failing with "database is locked".
+    # synchronous=NORMAL is durable against application crashes in WAL mode
+    # (only a power loss can drop the last commits). Transactions start as
+    # BEGIN IMMEDIATE so a writer takes the lock up front rather than failing
+    # when it upgrades from a read lock mid-transaction.
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    }
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"DATABASE_ENGINE must be sqlite or postgres, not {DATABASE_ENGINE!r}")
+
+# Optional read replica for the read-only views and GET lists (see
+# tasks.routing). SQLITE_REPLICA_PATH points at a second SQLite file, e.g.
+# one kept current with manage.py sync_replica for local testing.
+REPLICA_DATABASE = None
+REPLICA_PIN_SECONDS = 5
+_replica = {'sqlite': ('NAME', 'SQLITE_REPLICA_PATH'), 'postgres': ('HOST', 'POSTGRES_REPLICA_HOST')}[DATABASE_ENGINE]
+if os.environ.get(_replica[1]):
+    REPLICA_DATABASE = 'replica'
+    DATABASES['replica'] = dict(
+        DATABASES['default'],
+        **{_replica[0]: os.environ[_replica[1]]},
+        TEST={'MIRROR': 'default'},
+    )
+DATABASE_ROUTERS = ['tasks.routing.ReplicaRouter']
 
 
 # Password validation
@@ -93,6 +162,28 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# PASSWORD_HASHER picks the algorithm for new hashes: pbkdf2 (default, iteration
+# count from PBKDF2_ITERATIONS), scrypt, argon2 (needs argon2-cffi) or bcrypt
+# (needs bcrypt). The other hashers stay listed so existing hashes still verify;
+# they are rehashed with the preferred one on the next successful login.
+_PASSWORD_HASHERS = {
+    'pbkdf2': 'tasks.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'bcrypt': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+}
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+PBKDF2_ITERATIONS = int(os.environ.get('PBKDF2_ITERATIONS', 0)) or None
+
+# Failed logins per username before LoginView refuses attempts without hashing
+LOGIN_MAX_FAILURES = 5
+LOGIN_LOCKOUT_SECONDS = 300
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -124,6 +215,60 @@ REST_FRAMEWORK = {
     )
 }
 
+# Cache settings. Besides caching, the default cache holds state every worker
+# must agree on: the JWT deny-list, access-scope versions and login failure
+# counts. Local memory is per process, so it is only accepted for a single
+# worker (WEB_CONCURRENCY, as read by gunicorn); otherwise set CACHE_URL to a
+# redis:// URL (needs the redis package) or CACHE_BACKEND=database (run
+# ``manage.py createcachetable``).
+CACHE_URL = os.environ.get('CACHE_URL')
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'redis' if CACHE_URL else 'locmem')
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL or 'redis://localhost:6379/1',
+        }
+    }
+elif CACHE_BACKEND == 'database':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'taskflow_cache',
+        }
+    }
+elif CACHE_BACKEND == 'locmem':
+    if int(os.environ.get('WEB_CONCURRENCY', 1)) > 1:
+        raise ImproperlyConfigured(
+            "The local-memory cache is per process; with WEB_CONCURRENCY > 1 "
+            "set CACHE_URL or CACHE_BACKEND=database"
+        )
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'taskflow',
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"CACHE_BACKEND must be locmem, redis or database, not {CACHE_BACKEND!r}")
+# Safety net for the dashboard counters; signals invalidate them on writes
+DASHBOARD_STATS_TIMEOUT = 300
+
+# Pub/sub behind the server-sent events stream (api/async/events/). The local
+# broker only reaches streams served by the same process; with several
+# workers set EVENT_BROKER=tasks.events.RedisBroker and EVENT_BROKER_URL.
+EVENT_BROKER = os.environ.get('EVENT_BROKER', 'tasks.events.LocalBroker')
+EVENT_BROKER_URL = os.environ.get('EVENT_BROKER_URL', 'redis://localhost:6379/0')
+EVENT_STREAM_HEARTBEAT = 15
+
+# Per-request query count / DB time / render time; the histogram is served
+# at api/metrics/. Set to False to keep the Server-Timing header private.
+REQUEST_METRICS_SERVER_TIMING = os.environ.get('REQUEST_METRICS_SERVER_TIMING', 'true').lower() == 'true'
+
+# Cursor pagination for list endpoints (opt-in via ?cursor= or ?page_size=)
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 200
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # Your React app
@@ -158,8 +303,11 @@ AUTHENTICATION_BACKENDS = [
 ]
 
 REST_FRAMEWORK = {
+    # Builds request.user from the token claims (role, is_active, full_name)
+    # without a database query; use rest_framework_simplejwt's
+    # JWTAuthentication instead to load the user row on every request.
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'tasks.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -0,0 +1,292 @@
+"""
+Latency (p50/p95) and query counts of every route in tasks/urls.py at
+several data scales, written to a JSON baseline so later runs can be
+compared against it.
+
+Each scale is a fresh organisation from tasks.synthetic.generate_org (the
+same data for the same --seed) in a throwaway SQLite database. Requests go
+through the test client with a real JWT; writes run inside a transaction
+that is rolled back, so every iteration sees the same data.
+
+    python benchmarks/api.py --scales small,medium --output baseline.json
+    python benchmarks/api.py --scales small,medium --compare baseline.json
+
+--compare exits non-zero when an endpoint's p95 grew by more than
+--tolerance (and by at least 2 ms) or it issues more queries than before.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from indexes import setup_django
+
+SCALES = {
+    'small': dict(supermanagers=2, managers=10, employees=100, projects=50, tasks=5_000),
+    'medium': dict(supermanagers=3, managers=50, employees=1_000, projects=500, tasks=100_000),
+    'large': dict(supermanagers=5, managers=200, employees=5_000, projects=2_000, tasks=1_000_000),
+}
+PASSWORD = 'benchmark'
+PREFIX = 'bench'
+# Absolute slack so sub-millisecond endpoints don't flag on noise
+MIN_REGRESSION_MS = 2.0
+# Routes that cannot be timed as a request/response pair
+SKIPPED_ROUTES = {
+    'api-root': 'router index',
+    'async-events': 'server-sent event stream never completes',
+}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def pick_subjects():
+    """The busiest manager, their largest project, and a task and assignee in it."""
+    from django.db.models import Count
+
+    from tasks.models import CustomUser, Project, Task
+
+    manager_id = (
+        Project.objects.values('assigned_to_id').annotate(projects=Count('id'))
+        .order_by('-projects', 'assigned_to_id')[0]['assigned_to_id']
+    )
+    project_id = (
+        Project.objects.filter(assigned_to_id=manager_id)
+        .order_by('-stats__total_tasks', 'id').values_list('id', flat=True)[0]
+    )
+    task = Task.objects.filter(project_id=project_id).order_by('id')[0]
+    return {
+        'supermanager': CustomUser.objects.filter(role='supermanager').order_by('id')[0],
+        'manager': CustomUser.objects.get(pk=manager_id),
+        'employee': task.assigned_to,
+        'project': project_id,
+        'task': task.id,
+        'tasks': list(Task.objects.filter(project_id=project_id).order_by('id').values_list('id', flat=True)[:20]),
+    }
+
+
+def endpoints(s):
+    """(url name, label, role, method, path, body) for every benchmarked request."""
+    employee_id = s['employee'].id
+    new_tasks = [
+        {'title': f'Benchmark task {i}', 'project': s['project'], 'assigned_to': employee_id}
+        for i in range(20)
+    ]
+    return [
+        ('login', 'login', None, 'post', '/api/login/',
+         {'username': s['employee'].username, 'password': PASSWORD}),
+        ('user', 'user', 'employee', 'get', '/api/user/', None),
+        ('supermanager-dashboard-stats', None, 'supermanager', 'get', '/api/supermanager-dashboard-stats/', None),
+        ('manager-dashboard-stats', None, 'manager', 'get', '/api/manager-dashboard-stats/', None),
+        ('manager-employees', None, 'manager', 'get', '/api/manager/employees/', None),
+        ('recent-activity', None, 'supermanager', 'get', '/api/recent-activity/?limit=20', None),
+        ('activity-feed', None, 'supermanager', 'get', '/api/activity/?page_size=50', None),
+        ('reports', 'reports (all)', 'supermanager', 'get', '/api/reports/', None),
+        ('reports', 'reports (project)', 'supermanager', 'get', f'/api/reports/?project={s["project"]}', None),
+        ('reports-export', None, 'supermanager', 'get', '/api/reports/export/?output=ndjson', None),
+        ('reports-trends', None, 'manager', 'get', '/api/reports/trends/', None),
+        ('search', 'search (tasks)', 'supermanager', 'get', '/api/search/?q=invoice+export', None),
+        ('search', 'search (projects)', 'manager', 'get', '/api/search/?q=billing&type=projects', None),
+        ('request-metrics', None, 'supermanager', 'get', '/api/metrics/', None),
+        ('event-stream-ticket', None, 'employee', 'post', '/api/events/ticket/', None),
+        ('async-supermanager-dashboard-stats', None, 'supermanager', 'get',
+         '/api/async/supermanager-dashboard-stats/', None),
+        ('async-manager-dashboard-stats', None, 'manager', 'get', '/api/async/manager-dashboard-stats/', None),
+        ('async-recent-activity', None, 'supermanager', 'get', '/api/async/recent-activity/?limit=20', None),
+        ('async-reports', None, 'supermanager', 'get', f'/api/async/reports/?project={s["project"]}', None),
+        ('supermanager-users-list', None, 'supermanager', 'get', '/api/supermanager/users/?page_size=50', None),
+        ('supermanager-users-detail', None, 'supermanager', 'get', f'/api/supermanager/users/{employee_id}/', None),
+        ('supermanager-projects-list', None, 'supermanager', 'get', '/api/supermanager/projects/?page_size=50', None),
+        ('supermanager-projects-detail', None, 'supermanager', 'get',
+         f'/api/supermanager/projects/{s["project"]}/', None),
+        ('supermanager-tasks-list', 'supermanager-tasks-list (page)', 'supermanager', 'get',
+         '/api/supermanager/tasks/?page_size=50', None),
+        ('supermanager-tasks-list', 'supermanager-tasks-list (filtered)', 'supermanager', 'get',
+         '/api/supermanager/tasks/?status=pending,in_progress&overdue=true&ordering=-updated_at&page_size=50', None),
+        ('supermanager-tasks-list', 'supermanager-tasks-list (create)', 'supermanager', 'post',
+         '/api/supermanager/tasks/', new_tasks[0]),
+        ('supermanager-tasks-detail', None, 'supermanager', 'get', f'/api/supermanager/tasks/{s["task"]}/', None),
+        ('supermanager-tasks-export', None, 'supermanager', 'get',
+         f'/api/supermanager/tasks/export/?project={s["project"]}', None),
+        ('supermanager-tasks-bulk', None, 'supermanager', 'post', '/api/supermanager/tasks/bulk/', new_tasks),
+        ('supermanager-tasks-bulk-status', None, 'supermanager', 'post', '/api/supermanager/tasks/bulk-status/',
+         {'ids': s['tasks'], 'status': 'completed'}),
+        ('manager-projects-list', None, 'manager', 'get', '/api/manager/projects/', None),
+        ('manager-projects-detail', None, 'manager', 'get', f'/api/manager/projects/{s["project"]}/', None),
+        ('manager-tasks-list', None, 'manager', 'get', f'/api/manager/tasks/?project={s["project"]}', None),
+        ('manager-tasks-detail', 'manager-tasks-detail (patch)', 'manager', 'patch',
+         f'/api/manager/tasks/{s["task"]}/', {'status': 'in_progress'}),
+        ('manager-tasks-bulk', None, 'manager', 'post', '/api/manager/tasks/bulk/', new_tasks),
+        ('manager-tasks-bulk-status', None, 'manager', 'post', '/api/manager/tasks/bulk-status/',
+         {'ids': s['tasks'], 'status': 'in_progress'}),
+        ('employee-tasks-list', None, 'employee', 'get', '/api/employee/tasks/', None),
+        ('employee-tasks-detail', None, 'employee', 'get', f'/api/employee/tasks/{s["task"]}/', None),
+        ('employee-tasks-bulk-status', None, 'employee', 'post', '/api/employee/tasks/bulk-status/',
+         {'ids': [s['task']], 'status': 'completed'}),
+        # Bulk create/update is reserved for managers; this times the rejection
+        ('employee-tasks-bulk', None, 'employee', 'post', '/api/employee/tasks/bulk/', new_tasks),
+    ]
+
+
+def route_names():
+    from django.urls import URLPattern, URLResolver
+
+    from tasks import urls
+
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                yield from walk(pattern.url_patterns)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                yield pattern.name
+
+    return set(walk(urls.urlpatterns))
+
+
+def measure(subjects, repeat):
+    from django.core.cache import cache
+    from django.db import connection, transaction
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient
+
+    from tasks.authentication import tokens_for_user
+
+    tokens = {role: str(tokens_for_user(subjects[role]).access_token)
+              for role in ('supermanager', 'manager', 'employee')}
+    results = {}
+    for name, label, role, method, path, body in endpoints(subjects):
+        client = APIClient()
+        if role:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens[role]}')
+        timings, queries = [], []
+        for _ in range(repeat):
+            cache.clear()  # measure the database, not the dashboard cache or login guard
+            with transaction.atomic(), CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = getattr(client, method)(path, body, format='json')
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                timings.append((time.perf_counter() - start) * 1000)
+                transaction.set_rollback(True)
+            queries.append(len(ctx.captured_queries))
+        results[label or name] = {
+            'route': name,
+            'method': method.upper(),
+            'path': path,
+            'status': response.status_code,
+            'p50_ms': round(percentile(timings, 0.50), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'queries': max(queries),
+        }
+    return results
+
+
+def run_scale(name, seed, repeat):
+    from django.core.management import call_command
+    from django.db import connection
+
+    from tasks.synthetic import generate_org
+
+    call_command('flush', interactive=False, verbosity=0)
+    started = time.perf_counter()
+    rows = generate_org(**SCALES[name], seed=seed, prefix=PREFIX, password=PASSWORD)
+    print(f'[{name}] generated {rows} in {time.perf_counter() - started:.1f}s', file=sys.stderr)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return {'rows': rows, 'endpoints': measure(pick_subjects(), repeat)}
+
+
+def compare(baseline, current, tolerance):
+    """Lines describing regressions of ``current`` against ``baseline``."""
+    regressions = []
+    for scale, result in current['scales'].items():
+        before = baseline.get('scales', {}).get(scale, {}).get('endpoints', {})
+        for label, now in result['endpoints'].items():
+            old = before.get(label)
+            if old is None:
+                continue
+            slower = now['p95_ms'] - old['p95_ms']
+            if slower > MIN_REGRESSION_MS and now['p95_ms'] > old['p95_ms'] * (1 + tolerance):
+                regressions.append(f'{scale} {label}: p95 {old["p95_ms"]} -> {now["p95_ms"]} ms')
+            if now['queries'] > old['queries']:
+                regressions.append(f'{scale} {label}: queries {old["queries"]} -> {now["queries"]}')
+            if now['status'] != old['status']:
+                regressions.append(f'{scale} {label}: status {old["status"]} -> {now["status"]}')
+    return regressions
+
+
+def print_table(report):
+    for scale, result in report['scales'].items():
+        print(f'\n{scale}: {result["rows"]["tasks"]} tasks')
+        print(f'{"endpoint":<44}{"status":>7}{"p50 ms":>10}{"p95 ms":>10}{"queries":>9}')
+        for label, row in result['endpoints'].items():
+            print(f'{label:<44}{row["status"]:>7}{row["p50_ms"]:>10.1f}{row["p95_ms"]:>10.1f}{row["queries"]:>9}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', default='small,medium', help=f'Comma-separated subset of {", ".join(SCALES)}')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON file to check the results against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative p95 growth (default 0.25)')
+    parser.add_argument('--db', help='SQLite file to use (defaults to a temporary file)')
+    args = parser.parse_args()
+
+    scales = [scale.strip() for scale in args.scales.split(',') if scale.strip()]
+    unknown = set(scales) - set(SCALES)
+    if unknown:
+        parser.error(f'unknown scales: {", ".join(sorted(unknown))}')
+
+    setup_django(args.db or os.path.join(tempfile.mkdtemp(), 'bench.sqlite3'))
+
+    import django
+    from django.core.management import call_command
+    from django.db import connection
+
+    call_command('migrate', verbosity=0)
+    # 4xx responses (e.g. the rejected employee bulk write) would log a warning per iteration
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+    report = {
+        'generated_at': datetime.now(dt_timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': f'{connection.vendor} {connection.Database.sqlite_version}',
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'scales': {},
+    }
+    for scale in scales:
+        report['scales'][scale] = run_scale(scale, args.seed, args.repeat)
+
+    covered = {row['route'] for result in report['scales'].values() for row in result['endpoints'].values()}
+    missing = route_names() - covered - set(SKIPPED_ROUTES)
+    if missing:
+        print(f'Routes without a benchmark: {", ".join(sorted(missing))}', file=sys.stderr)
+
+    print_table(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+        for line in regressions:
+            print(f'REGRESSION {line}')
+        if regressions:
+            sys.exit(1)
+        print(f'\nNo regressions against {args.compare}.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Task-update throughput with several worker processes writing to one SQLite
+file, as gunicorn workers do: Django's stock SQLite settings (rollback
+journal, deferred transactions) against the profile in backend/settings.py
+(WAL, busy_timeout, BEGIN IMMEDIATE).
+
+    python benchmarks/concurrent_writes.py --workers 1,2,4,8 --seconds 5
+
+Each write is a status change through Task.save(), so it includes the
+signal work: the ProjectStats counters, the search index and the change
+event. "locked" counts writes that failed with "database is locked".
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from indexes import setup_django
+
+PROFILES = {
+    'stock': {'init_command': 'PRAGMA journal_mode=DELETE'},
+    'tuned': None,  # backend/settings.py as configured
+}
+STATUSES = ('pending', 'in_progress', 'completed')
+
+
+def configure(db_path, profile):
+    from django.conf import settings
+
+    if PROFILES[profile] is not None:
+        settings.DATABASES['default']['OPTIONS'] = PROFILES[profile]
+    setup_django(db_path)
+
+
+def prepare(db_path, profile, tasks):
+    configure(db_path, profile)
+
+    from django.core.management import call_command
+    from django.db import connections
+
+    from tasks.synthetic import generate_org
+
+    call_command('migrate', verbosity=0)
+    generate_org(tasks=tasks, projects=20, seed=1)
+    connections.close_all()
+
+
+def worker(db_path, profile, seconds, seed):
+    configure(db_path, profile)
+
+    from django.db import OperationalError, transaction
+
+    from tasks.models import Task
+
+    rng = random.Random(seed)
+    ids = list(Task.objects.values_list('id', flat=True))
+    written = locked = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        try:
+            with transaction.atomic():
+                task = Task.objects.get(pk=rng.choice(ids))
+                task.status = rng.choice([status for status in STATUSES if status != task.status])
+                task.save()
+            written += 1
+        except OperationalError:
+            locked += 1
+    return written, locked
+
+
+def run(db_path, profile, workers, seconds):
+    with multiprocessing.get_context('spawn').Pool(workers) as pool:
+        counts = pool.starmap(worker, [(db_path, profile, seconds, seed) for seed in range(workers)])
+    return sum(written for written, _ in counts), sum(locked for _, locked in counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', default='1,2,4,8', help='Comma-separated worker counts')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--tasks', type=int, default=20_000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    worker_counts = [int(count) for count in args.workers.split(',')]
+    print(f'{"profile":<8}{"workers":>8}{"writes/s":>12}{"locked":>9}')
+    for profile in PROFILES:
+        db_path = os.path.join(directory, f'{profile}.sqlite3')
+        # Seeded in a child process so this one never opens a connection
+        with multiprocessing.get_context('spawn').Pool(1) as pool:
+            pool.apply(prepare, (db_path, profile, args.tasks))
+        for workers in worker_counts:
+            written, locked = run(db_path, profile, workers, args.seconds)
+            print(f'{profile:<8}{workers:>8}{written / args.seconds:>12.0f}{locked:>9}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""
+Before/after latency of the dashboard and list endpoints around the indexes
+added by the 0004_hot_path_indexes migration.
+
+Seeds a throwaway SQLite database (about 1M tasks by default) migrated to the
+latest schema, drops the 0004 indexes and measures every endpoint, then
+recreates them and measures again. Everything else about the schema is the
+same on both sides, so the difference is the indexes alone:
+
+    python benchmarks/indexes.py --tasks 1000000 --repeat 5
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from importlib import import_module
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+INDEX_MIGRATION = '0004_hot_path_indexes'
+
+
+def setup_django(db_path):
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.ALLOWED_HOSTS = ['testserver']
+
+    import django
+    django.setup()
+
+
+def _ts(value):
+    # Raw inserts bypass Django's adapters, so store what it would: naive UTC text
+    return value.replace(tzinfo=None).isoformat(' ')
+
+
+def seed(tasks, projects, managers, employees, seed_value=42):
+    from django.db import connection, transaction
+
+    from tasks.models import CustomUser, Project, Task
+
+    rng = random.Random(seed_value)
+    now = datetime.now(dt_timezone.utc)
+    password = '!'  # unusable password; the benchmark authenticates directly
+
+    user_rows = [('boss', 'boss@example.com', 'Boss', 'supermanager')]
+    user_rows += [(f'manager{i}', f'manager{i}@example.com', f'Manager {i}', 'manager') for i in range(managers)]
+    user_rows += [(f'employee{i}', f'employee{i}@example.com', f'Employee {i}', 'employee') for i in range(employees)]
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        columns = ['password', 'username', 'email', 'full_name', 'role', 'date_joined', 'updated_at']
+        rows = [
+            (password, u, e, n, r, _ts(now - timedelta(days=rng.randint(0, 400))), _ts(now))
+            for u, e, n, r in user_rows
+        ]
+        cursor.executemany(
+            f'INSERT INTO {CustomUser._meta.db_table} '
+            f'(is_superuser, is_active, is_staff, {", ".join(columns)}) '
+            f'VALUES (0, 1, 0, {", ".join(["%s"] * len(columns))})',
+            rows
+        )
+        ids = dict(CustomUser.objects.values_list('username', 'id'))
+        manager_ids = [ids[f'manager{i}'] for i in range(managers)]
+        employee_ids = [ids[f'employee{i}'] for i in range(employees)]
+
+        cursor.executemany(
+            f'INSERT INTO {Project._meta.db_table} '
+            '(name, description, created_by_id, assigned_to_id, created_at, deadline, updated_at) '
+            'VALUES (%s, %s, %s, %s, %s, %s, %s)',
+            [
+                (f'Project {i}', 'Seeded project', ids['boss'], rng.choice(manager_ids),
+                 _ts(now - timedelta(days=rng.randint(0, 400))),
+                 (now + timedelta(days=rng.randint(-60, 120))).date().isoformat(),
+                 _ts(now - timedelta(days=rng.randint(0, 60))))
+                for i in range(projects)
+            ]
+        )
+        project_rows = list(Project.objects.values_list('id', 'assigned_to_id'))
+
+        statuses = ['pending', 'in_progress', 'completed']
+        batch = []
+        for i in range(tasks):
+            project_id, manager_id = rng.choice(project_rows)
+            created = now - timedelta(minutes=rng.randint(0, 400 * 24 * 60))
+            batch.append((
+                f'Task {i}', 'Seeded task', project_id, manager_id, rng.choice(employee_ids),
+                rng.choice(statuses), _ts(created),
+                (created + timedelta(days=rng.randint(-5, 60))).date().isoformat() if rng.random() < 0.9 else None,
+                _ts(created + timedelta(minutes=rng.randint(0, 60 * 24 * 30))),
+            ))
+            if len(batch) == 10000 or i == tasks - 1:
+                cursor.executemany(
+                    f'INSERT INTO {Task._meta.db_table} '
+                    '(title, description, project_id, assigned_by_id, assigned_to_id, status, '
+                    'created_at, due_date, updated_at) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)',
+                    batch
+                )
+                batch = []
+
+    _refresh_derived_tables()
+    return ids['boss'], manager_ids[0], employee_ids[0], project_rows[0][0]
+
+
+def _refresh_derived_tables():
+    # Raw inserts skip the signals that maintain the rollup and search index
+    from tasks.rollups import rebuild_project_stats
+    from tasks.search import rebuild_index
+
+    rebuild_project_stats()
+    rebuild_index()
+
+
+def hot_path_indexes():
+    """(model, index) for every index INDEX_MIGRATION adds."""
+    from django.apps import apps
+    from django.db.migrations import AddIndex
+
+    migration = import_module(f'tasks.migrations.{INDEX_MIGRATION}').Migration
+    return [
+        (apps.get_model('tasks', operation.model_name), operation.index)
+        for operation in migration.operations if isinstance(operation, AddIndex)
+    ]
+
+
+def drop_indexes(indexes):
+    from django.db import connection
+
+    with connection.schema_editor() as editor:
+        for model, index in indexes:
+            editor.remove_index(model, index)
+
+
+def create_indexes(indexes):
+    from django.db import connection
+
+    with connection.schema_editor() as editor:
+        for model, index in indexes:
+            editor.add_index(model, index)
+
+
+def endpoints(supermanager_id, manager_id, employee_id, project_id):
+    return [
+        ('supermanager-dashboard-stats', supermanager_id, '/api/supermanager-dashboard-stats/'),
+        ('manager-dashboard-stats', manager_id, '/api/manager-dashboard-stats/'),
+        ('reports (project)', supermanager_id, f'/api/reports/?project={project_id}'),
+        ('recent-activity', supermanager_id, '/api/recent-activity/'),
+        ('supermanager/tasks (project)', supermanager_id, f'/api/supermanager/tasks/?project={project_id}'),
+        ('manager/projects', manager_id, '/api/manager/projects/'),
+        ('manager/tasks (project)', manager_id, f'/api/manager/tasks/?project={project_id}'),
+        ('employee/tasks', employee_id, '/api/employee/tasks/'),
+        ('supermanager/users', supermanager_id, '/api/supermanager/users/?dashboard=true'),
+    ]
+
+
+def measure(targets, repeat):
+    from django.core.cache import cache
+    from django.db import connection
+    from rest_framework.test import APIClient
+
+    from tasks.models import CustomUser
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')  # give the planner statistics for the current schema
+
+    client = APIClient()
+    results = {}
+    for name, user_id, url in targets:
+        client.force_authenticate(CustomUser.objects.get(pk=user_id))
+        timings = []
+        for _ in range(repeat):
+            cache.clear()  # measure the database, not the dashboard cache
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, (url, response.status_code)
+        results[name] = statistics.median(timings)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=1_000_000)
+    parser.add_argument('--projects', type=int, default=2000)
+    parser.add_argument('--managers', type=int, default=50)
+    parser.add_argument('--employees', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--db', help='SQLite file to use (defaults to a temporary file)')
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+    setup_django(db_path)
+
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+    indexes = hot_path_indexes()
+    drop_indexes(indexes)
+
+    started = time.perf_counter()
+    targets = endpoints(*seed(args.tasks, args.projects, args.managers, args.employees))
+    print(f'Seeded {args.tasks} tasks in {time.perf_counter() - started:.1f}s ({db_path})')
+
+    before = measure(targets, args.repeat)
+    started = time.perf_counter()
+    create_indexes(indexes)
+    print(f'Built indexes in {time.perf_counter() - started:.1f}s')
+    after = measure(targets, args.repeat)
+
+    print(f'\n{"endpoint":<32}{"before ms":>12}{"after ms":>12}{"speedup":>10}')
+    for name, _, _ in targets:
+        print(f'{name:<32}{before[name]:>12.1f}{after[name]:>12.1f}{before[name] / after[name]:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
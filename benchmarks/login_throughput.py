@@ -0,0 +1,91 @@
+"""
+Logins/sec through LoginView for each configured password hasher, measured
+sequentially in one process (i.e. per worker).
+
+    python benchmarks/login_throughput.py --logins 20
+    python benchmarks/login_throughput.py --pbkdf2-iterations 1000000 260000 100000
+
+Argon2 and bcrypt are included when argon2-cffi / bcrypt are installed.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from indexes import setup_django
+
+HASHERS = {
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'bcrypt': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+}
+
+
+def pbkdf2_hasher(iterations):
+    from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+    return type(f'PBKDF2x{iterations}', (PBKDF2PasswordHasher,), {'iterations': iterations})
+
+
+def available(hasher_path):
+    from django.utils.module_loading import import_string
+
+    hasher = import_string(hasher_path)()
+    try:
+        hasher.encode('probe', hasher.salt())
+    except ValueError:  # optional library (argon2-cffi, bcrypt) missing
+        return False
+    return True
+
+
+def measure(label, hasher_path, logins):
+    from django.test import Client, override_settings
+
+    from tasks.models import CustomUser
+
+    with override_settings(PASSWORD_HASHERS=[hasher_path]):
+        CustomUser.objects.filter(username='bench').delete()
+        CustomUser.objects.create_user('bench', 'bench@example.com', 'bench-password', role='employee')
+        client = Client()
+        start = time.perf_counter()
+        for _ in range(logins):
+            response = client.post(
+                '/api/login/', {'username': 'bench', 'password': 'bench-password'},
+                content_type='application/json'
+            )
+            assert response.status_code == 200, response.content
+        elapsed = time.perf_counter() - start
+    print(f'{label:<28}{logins / elapsed:>12.1f}{elapsed / logins * 1000:>12.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--logins', type=int, default=20)
+    parser.add_argument('--pbkdf2-iterations', type=int, nargs='+', default=[1_000_000, 600_000, 260_000])
+    args = parser.parse_args()
+
+    setup_django(os.path.join(tempfile.mkdtemp(), 'bench.sqlite3'))
+
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+
+    module = sys.modules[__name__]
+    candidates = []
+    for iterations in args.pbkdf2_iterations:
+        hasher = pbkdf2_hasher(iterations)
+        setattr(module, hasher.__name__, hasher)  # importable by dotted path for override_settings
+        candidates.append((f'pbkdf2_sha256 x{iterations}', f'{__name__}.{hasher.__name__}'))
+    candidates += list(HASHERS.items())
+
+    print(f'{"hasher":<28}{"logins/sec":>12}{"ms/login":>12}')
+    for label, path in candidates:
+        if available(path):
+            measure(label, path, args.logins)
+        else:
+            print(f'{label:<28}{"not installed":>24}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Latency of the search endpoint against a seeded SQLite database, for a few
+query shapes and roles.
+
+    python benchmarks/search.py --tasks 1000000 --repeat 5
+
+Seeded titles are "Task <n>", so "Task 4242" matches one row and "Task"
+matches all of them (the worst case for ranking).
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from indexes import seed, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--db', help='SQLite file to use (defaults to a temporary file)')
+    args = parser.parse_args()
+
+    setup_django(args.db or os.path.join(tempfile.mkdtemp(), 'bench.sqlite3'))
+
+    from django.core.management import call_command
+    from rest_framework.test import APIClient
+
+    from tasks.models import CustomUser
+
+    call_command('migrate', verbosity=0)
+    started = time.perf_counter()
+    supermanager_id, manager_id, employee_id, _ = seed(args.tasks, projects=2000, managers=50, employees=1000)
+    print(f'Seeded and indexed {args.tasks} tasks in {time.perf_counter() - started:.1f}s')
+
+    targets = [
+        ('one match, supermanager', supermanager_id, '/api/search/?q=Task+4242'),
+        ('prefix, supermanager', supermanager_id, '/api/search/?q=Task+424'),
+        ('every row, supermanager', supermanager_id, '/api/search/?q=Task'),
+        ('every row, manager', manager_id, '/api/search/?q=Task'),
+        ('every row, employee', employee_id, '/api/search/?q=Task'),
+        ('projects, supermanager', supermanager_id, '/api/search/?q=Project+17&type=projects'),
+    ]
+    client = APIClient()
+    print(f'\n{"query":<28}{"median ms":>12}')
+    for name, user_id, url in targets:
+        client.force_authenticate(CustomUser.objects.get(pk=user_id))
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, (url, response.status_code)
+        print(f'{name:<28}{statistics.median(timings):>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
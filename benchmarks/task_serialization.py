@@ -0,0 +1,62 @@
+"""
+Task list serialization throughput: TaskSerializer(many=True) against the
+flat-row fast path used by the task list endpoints.
+
+    python benchmarks/task_serialization.py --rows 20000 --repeat 5
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from indexes import seed, setup_django
+
+
+def throughput(func, rows, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return rows / statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django(os.path.join(tempfile.mkdtemp(), 'bench.sqlite3'))
+
+    from django.core.management import call_command
+    from rest_framework.renderers import JSONRenderer
+
+    from tasks.models import Task
+    from tasks.serializers import TASK_ROW_FIELDS, TaskSerializer, serialize_task_rows
+
+    call_command('migrate', verbosity=0)
+    seed(args.rows, projects=200, managers=20, employees=200)
+
+    queryset = Task.objects.select_related('assigned_to', 'assigned_by', 'project')
+    renderer = JSONRenderer()
+
+    def drf():
+        return renderer.render(TaskSerializer(queryset.all(), many=True).data)
+
+    def fast():
+        return renderer.render(serialize_task_rows(queryset.values(*TASK_ROW_FIELDS)))
+
+    assert drf() == fast(), 'fast path output differs from TaskSerializer'
+
+    drf_rate = throughput(drf, args.rows, args.repeat)
+    fast_rate = throughput(fast, args.rows, args.repeat)
+    print(f'{"path":<24}{"rows/sec":>14}')
+    print(f'{"TaskSerializer":<24}{drf_rate:>14,.0f}')
+    print(f'{"serialize_task_rows":<24}{fast_rate:>14,.0f}')
+    print(f'speedup: {fast_rate / drf_rate:.1f}x (query + serialization + JSON rendering)')
+
+
+if __name__ == '__main__':
+    main()
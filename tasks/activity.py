@@ -0,0 +1,219 @@
+import asyncio
+import heapq
+from contextvars import ContextVar
+from datetime import timedelta
+from itertools import islice
+
+from django.db.models import Case, F, Q, When
+from django.utils.timezone import now
+from rest_framework.permissions import SAFE_METHODS
+
+from .models import Activity, CustomUser, Project, Task
+
+# Activity log of the write request currently being handled, if any
+_current_log = ContextVar('activity_log', default=None)
+
+CONTENT_TYPES = {'customuser': 'user'}
+
+
+class ActivityLog:
+    """Collects Activity rows during a request and inserts them in one batch."""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.entries = []
+
+    def add(self, action, instance, **details):
+        self.entries.append(Activity(
+            user_id=self.user_id,
+            action=action,
+            content_type=CONTENT_TYPES.get(instance._meta.model_name, instance._meta.model_name),
+            object_id=instance.pk,
+            details=details,
+        ))
+
+    def flush(self):
+        if self.entries:
+            Activity.objects.bulk_create(self.entries)
+            self.entries = []
+
+
+def record_activity(action, instance, **details):
+    """Queue an event on the current request's log; a no-op outside viewsets."""
+    log = _current_log.get()
+    if log is not None and instance.pk is not None:
+        log.add(action, instance, **details)
+
+
+class ActivityLogMixin:
+    """
+    Records create/update/delete/status-change events for writes made through
+    a viewset. Model signals call record_activity() while the request is in
+    progress and everything is written with a single bulk insert once the
+    response is ready.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method not in SAFE_METHODS:
+            self._activity_log = ActivityLog(request.user.id)
+            self._activity_token = _current_log.set(self._activity_log)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        token = getattr(self, '_activity_token', None)
+        if token is not None:
+            _current_log.reset(token)
+            self._activity_token = None
+            if response.status_code < 400:
+                self._activity_log.flush()
+        return response
+
+
+def _display_name(user):
+    return user.full_name or user.username
+
+
+def _created_tasks(limit, before=None):
+    tasks = Task.objects.filter(created_at__gte=now() - timedelta(days=1))
+    if before:
+        tasks = tasks.filter(created_at__lt=before)
+    tasks = tasks.select_related('assigned_by', 'assigned_to', 'project').order_by('-created_at', '-id')
+    return tasks[:limit]
+
+
+def _created_task_event(task):
+    return {
+        "id": f"task_{task.id}_created",
+        "type": "task",
+        "title": f"Task created: {task.title}",
+        "description": f"Assigned to {_display_name(task.assigned_to)}",
+        "timestamp": task.created_at,
+        "user": _display_name(task.assigned_by),
+        "user_role": task.assigned_by.role,
+        "status": task.status,
+        "action": "created",
+        "task_title": task.title,
+        "project_name": task.project.name if task.project else "No Project",
+        "assigned_to": _display_name(task.assigned_to)
+    }
+
+
+def _completed_tasks(limit, before=None):
+    tasks = Task.objects.filter(
+        status='completed',
+        updated_at__gte=now() - timedelta(days=1),
+    ).exclude(updated_at=F('created_at'))  # Ensure it was updated after creation
+    if before:
+        tasks = tasks.filter(updated_at__lt=before)
+    tasks = tasks.select_related('assigned_by', 'assigned_to', 'project').order_by('-updated_at', '-id')
+    return tasks[:limit]
+
+
+def _completed_task_event(task):
+    # Completions are attributed to the manager who assigned the task, not the employee
+    return {
+        "id": f"task_{task.id}_completed",
+        "type": "task",
+        "title": f"Task completed: {task.title}",
+        "description": f"Completed by team under {_display_name(task.assigned_by)}",
+        "timestamp": task.updated_at,
+        "user": _display_name(task.assigned_by),
+        "user_role": task.assigned_by.role,
+        "status": "completed",
+        "action": "completed",
+        "task_title": task.title,
+        "project_name": task.project.name if task.project else "No Project",
+        "completed_by": _display_name(task.assigned_to)
+    }
+
+
+def _projects(limit, before=None):
+    since = now() - timedelta(days=30)
+    projects = Project.objects.filter(
+        Q(created_at__gte=since) | Q(updated_at__gte=since)
+    ).annotate(
+        activity_at=Case(
+            When(updated_at=F('created_at'), then=F('created_at')),
+            default=F('updated_at'),
+        )
+    )
+    if before:
+        projects = projects.filter(activity_at__lt=before)
+    projects = projects.select_related('created_by').order_by('-activity_at', '-id')
+    return projects[:limit]
+
+
+def _project_event(project):
+    action = "updated" if project.updated_at != project.created_at else "created"
+    return {
+        "id": f"project_{project.id}",
+        "type": "project",
+        "title": f"Project {action}: {project.name}",
+        "description": project.description,
+        "timestamp": project.activity_at,
+        "user": _display_name(project.created_by),
+        "user_role": project.created_by.role,
+        "status": "active",
+        "action": action,
+        "project_name": project.name
+    }
+
+
+def _users(limit, before=None):
+    users = CustomUser.objects.filter(date_joined__gte=now() - timedelta(days=30))
+    if before:
+        users = users.filter(date_joined__lt=before)
+    return users.order_by('-date_joined', '-id')[:limit]
+
+
+def _user_event(user):
+    return {
+        "id": f"user_{user.id}",
+        "type": "user",
+        "title": f"User created: {_display_name(user)}",
+        "description": f"New {user.role} account created",
+        "timestamp": user.date_joined,
+        "user": "System",
+        "user_role": "supermanager",
+        "status": "active" if user.is_active else "inactive",
+        "action": "created",
+        "target_user": _display_name(user),
+        "user_role_created": user.role
+    }
+
+
+# (newest-first queryset of at most ``limit`` rows, row -> activity dict)
+ACTIVITY_SOURCES = [
+    (_created_tasks, _created_task_event),
+    (_completed_tasks, _completed_task_event),
+    (_projects, _project_event),
+    (_users, _user_event),
+]
+
+
+def _merge(streams, limit):
+    merged = heapq.merge(*streams, key=lambda activity: activity['timestamp'], reverse=True)
+    return list(islice(merged, limit))
+
+
+def recent_activity(limit=10, before=None):
+    """
+    Newest ``limit`` activity items across tasks, projects and users.
+
+    Each source is ordered and limited in SQL, so at most ``limit`` rows are
+    read from each; the sorted streams are merged lazily and the merge stops
+    as soon as ``limit`` items have been produced. ``before`` restricts the
+    result to items strictly older than that timestamp, for paging back.
+    """
+    streams = [map(to_event, source(limit, before)) for source, to_event in ACTIVITY_SOURCES]
+    return _merge(streams, limit)
+
+
+async def arecent_activity(limit=10, before=None):
+    """Async recent_activity(): the per-source queries run concurrently."""
+    async def fetch(source, to_event):
+        return [to_event(row) async for row in source(limit, before).aiterator()]
+
+    streams = await asyncio.gather(*(fetch(source, to_event) for source, to_event in ACTIVITY_SOURCES))
+    return _merge(streams, limit)
@@ -0,0 +1,134 @@
+"""
+Async variants of the read-only dashboard/report endpoints. Served under
+api/async/ with the same responses as their APIView counterparts; when the
+project runs under an ASGI server (see backend/asgi.py) a slow poll on one
+of these no longer ties up a worker thread, and the independent queries
+behind each response run concurrently. api/async/events/ streams change
+notifications (see tasks.events) so clients can stop polling altogether;
+it holds its connection open indefinitely, so it is only served under ASGI.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import APIException
+from rest_framework.utils.encoders import JSONEncoder
+
+from .activity import arecent_activity
+from .authentication import StatelessJWTAuthentication
+from .dashboard import amanager_stats, asupermanager_stats
+from .events import aredeem_stream_ticket, format_event, get_broker, visible_to
+from .reports import abuild_report
+
+
+def json_response(data, status=200):
+    # DRF's encoder, so dates/decimals render exactly as in the sync views
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+def async_api_view(role=None, stream_ticket=False):
+    """
+    Authenticate with the same JWT backend as the REST API and, if ``role``
+    is given, reject other roles the way the sync views do. ``stream_ticket``
+    also accepts a ticket from api/events/ticket/ as ?ticket=, for clients
+    such as the browser's EventSource that cannot set an Authorization header.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return json_response({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+            if stream_ticket and 'HTTP_AUTHORIZATION' not in request.META and request.GET.get('ticket'):
+                access_token = await aredeem_stream_ticket(request.GET['ticket'])
+                if access_token is None:
+                    return json_response({'detail': 'Stream ticket is invalid or expired.'}, status=401)
+                request.META['HTTP_AUTHORIZATION'] = f'Bearer {access_token}'
+            try:
+                result = await sync_to_async(StatelessJWTAuthentication().authenticate)(request)
+            except APIException as exc:
+                return json_response({'detail': exc.detail}, status=exc.status_code)
+            if result is None:
+                return json_response({'detail': 'Authentication credentials were not provided.'}, status=401)
+            request.user = result[0]
+            if role and request.user.role != role:
+                return json_response({'error': 'Unauthorized'}, status=403)
+            return await view(request, *args, **kwargs)
+        wrapper.replica_reads = True  # read-only; see tasks.routing
+        return wrapper
+    return decorator
+
+
+@async_api_view(role='supermanager')
+async def supermanager_dashboard_stats(request):
+    return json_response(await asupermanager_stats())
+
+
+@async_api_view(role='manager')
+async def manager_dashboard_stats(request):
+    return json_response(await amanager_stats(request.user))
+
+
+@async_api_view()
+async def recent_activity(request):
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 100)
+    except ValueError:
+        return json_response({'error': 'limit must be an integer'}, status=400)
+
+    before = request.GET.get('before')
+    if before:
+        before = parse_datetime(before)
+        if before is None:
+            return json_response({'error': 'before must be an ISO 8601 timestamp'}, status=400)
+        if timezone.is_naive(before):
+            before = timezone.make_aware(before)
+
+    return json_response(await arecent_activity(limit, before))
+
+
+@async_api_view()
+async def report(request):
+    return json_response(await abuild_report(request.GET.get('project')))
+
+
+def asgi_only(view):
+    # Under WSGI Django drains an async iterator synchronously, so an endless
+    # stream would hold a worker for as long as the client stays connected
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if not isinstance(request, ASGIRequest):
+            return json_response({'error': 'This endpoint is only served under ASGI'}, status=501)
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+@asgi_only
+@async_api_view(stream_ticket=True)
+async def events(request):
+    """
+    Server-sent events stream of task/project changes visible to the user:
+    managers get their projects and the tasks in them, employees the tasks
+    assigned to them, supermanagers everything. A comment line is sent
+    every EVENT_STREAM_HEARTBEAT seconds so proxies keep the connection open.
+    """
+    user = request.user
+    heartbeat = getattr(settings, 'EVENT_STREAM_HEARTBEAT', 15)
+
+    async def stream():
+        yield f'retry: {heartbeat * 1000}\n\n'
+        async with get_broker().subscribe() as subscription:
+            while True:
+                message = await subscription.get(timeout=heartbeat)
+                if message is None:
+                    yield ': keepalive\n\n'
+                elif visible_to(message, user):
+                    yield format_event(message)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the stream
+    return response
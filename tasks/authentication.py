@@ -0,0 +1,104 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Copied from the user into every token issued by LoginView
+TOKEN_USER_CLAIMS = ('role', 'is_active', 'full_name')
+# Issue time in microseconds; iat has whole seconds only, which can't order a
+# login and a revocation in the same second. Access tokens minted from a
+# refresh token inherit it, so refreshing doesn't outlive a revocation either.
+ISSUED_AT_CLAIM = 'iat_us'
+
+
+def _now_us():
+    return time.time_ns() // 1000
+
+
+def tokens_for_user(user):
+    refresh = RefreshToken.for_user(user)
+    for claim in TOKEN_USER_CLAIMS:
+        refresh[claim] = getattr(user, claim)
+    refresh[ISSUED_AT_CLAIM] = _now_us()
+    return refresh
+
+
+def _revocation_key(user_id):
+    return f'jwt-revoked:{user_id}'
+
+
+def revoke_user_tokens(user_id):
+    """
+    Reject every token issued to ``user_id`` up to now. Entries only need to
+    outlive the access tokens they cover, so they expire with them. The
+    deny-list lives in the default cache, which settings require to be
+    shared between workers.
+    """
+    timeout = int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+    cache.set(_revocation_key(user_id), _now_us(), timeout)
+
+
+def is_token_revoked(validated_token):
+    revoked_at = cache.get(_revocation_key(validated_token[api_settings.USER_ID_CLAIM]))
+    if revoked_at is None:
+        return False
+    issued_at = validated_token.get(ISSUED_AT_CLAIM)
+    if issued_at is None:
+        # Only whole seconds are known; a token from the revocation's second
+        # may predate it, so it is rejected too
+        return validated_token.get('iat', 0) <= revoked_at // 1_000_000
+    return issued_at < revoked_at
+
+
+class ClaimsUser(TokenUser):
+    """request.user built from the token claims instead of a CustomUser row."""
+
+    @cached_property
+    def id(self):
+        # simplejwt stores the id claim as a string; match CustomUser.id
+        return get_user_model()._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def role(self):
+        return self.token.get('role')
+
+    @cached_property
+    def full_name(self):
+        return self.token.get('full_name', '')
+
+    @cached_property
+    def is_active(self):
+        return self.token.get('is_active', False)
+
+    def __str__(self):
+        return f"{self.full_name} ({self.role})"
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Authenticates from the access token alone: tokens carrying the user claims
+    are turned into a ClaimsUser without touching the database. Tokens issued
+    before the claims existed fall back to the usual user lookup. Role or
+    status changes, deactivation and deletion revoke outstanding tokens
+    through a cached deny-list (see revoke_user_tokens).
+    """
+
+    def get_user(self, validated_token):
+        claims = (api_settings.USER_ID_CLAIM,) + TOKEN_USER_CLAIMS
+        if not all(claim in validated_token for claim in claims):
+            return super().get_user(validated_token)
+
+        if is_token_revoked(validated_token):
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+        user = ClaimsUser(validated_token)
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
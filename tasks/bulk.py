@@ -0,0 +1,236 @@
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .activity import record_activity
+from .dashboard import invalidate_dashboard_stats
+from .events import publish_on_commit, task_event_data
+from .models import CustomUser, Project, Task
+from .rollups import refresh_project_stats
+from .scopes import can_access_project, invalidate_access_scope
+from .search import index_instances
+
+BULK_UPDATE_FIELDS = ('title', 'description', 'project', 'assigned_to', 'status', 'due_date')
+
+
+class BulkTaskItemSerializer(serializers.Serializer):
+    """
+    Shape/format validation for one item of a bulk request. Related ids are
+    plain integers here; they are resolved for the whole batch at once by
+    BulkTaskWriter instead of one PrimaryKeyRelatedField lookup per item.
+    """
+    id = serializers.IntegerField(required=False)
+    title = serializers.CharField(max_length=100)
+    description = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    project = serializers.IntegerField()
+    assigned_to = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES, required=False)
+    due_date = serializers.DateField(required=False, allow_null=True)
+
+
+class BulkStatusSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES)
+
+
+class BulkTaskWriter:
+    """
+    Validates and writes a batch of tasks with a fixed number of queries:
+    one per referenced table to resolve ids, then bulk_create/bulk_update
+    inside a single transaction.
+    """
+
+    def __init__(self, user, scoped_queryset, limit):
+        self.user = user
+        self.scoped_queryset = scoped_queryset
+        self.limit = limit
+
+    def _validate_items(self, data, partial):
+        if not isinstance(data, list) or not data:
+            raise serializers.ValidationError({'non_field_errors': ['Expected a non-empty list of tasks.']})
+        if len(data) > self.limit:
+            raise serializers.ValidationError(
+                {'non_field_errors': [f'At most {self.limit} tasks can be sent in one request.']}
+            )
+
+        items, errors = [], []
+        for item in data:
+            serializer = BulkTaskItemSerializer(data=item, partial=partial)
+            if serializer.is_valid():
+                items.append(serializer.validated_data)
+                errors.append({})
+            else:
+                items.append(None)
+                errors.append(serializer.errors)
+        if partial:
+            for item, error in zip(items, errors):
+                if item is not None and 'id' not in item:
+                    error['id'] = ['This field is required.']
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+    def _resolve(self, items):
+        """Look up every referenced project and employee in one query each."""
+        # Projects outside the user's scope are reported as invalid without being looked up
+        project_ids = {
+            item['project'] for item in items
+            if 'project' in item and can_access_project(self.user, item['project'])
+        }
+        employee_ids = {item['assigned_to'] for item in items if 'assigned_to' in item}
+
+        projects = Project.objects.filter(id__in=project_ids)
+        projects = {project.id: project for project in projects} if project_ids else {}
+        employees = (
+            {user.id: user for user in CustomUser.objects.filter(id__in=employee_ids, role='employee')}
+            if employee_ids else {}
+        )
+
+        errors = []
+        for item in items:
+            error = {}
+            if 'project' in item and item['project'] not in projects:
+                error['project'] = [f'Invalid project "{item["project"]}".']
+            if 'assigned_to' in item and item['assigned_to'] not in employees:
+                error['assigned_to'] = ['Must assign to an employee']
+            errors.append(error)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return projects, employees
+
+    def _apply(self, task, item, projects, employees):
+        for field, value in item.items():
+            if field == 'id':
+                continue
+            if field == 'project':
+                task.project = projects[value]
+            elif field == 'assigned_to':
+                task.assigned_to = employees[value]
+            else:
+                setattr(task, field, value)
+
+    def _invalidate(self, project_manager_ids):
+        manager_ids = list(project_manager_ids)
+        transaction.on_commit(lambda: invalidate_dashboard_stats(manager_ids))
+
+    def create(self, data):
+        items = self._validate_items(data, partial=False)
+        projects, employees = self._resolve(items)
+
+        tasks = []
+        for item in items:
+            task = Task(assigned_by_id=self.user.id)
+            self._apply(task, item, projects, employees)
+            tasks.append(task)
+
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks)
+            refresh_project_stats(task.project_id for task in tasks)
+            index_instances(Task, tasks)
+            self._invalidate(task.project.assigned_to_id for task in tasks)
+            invalidate_access_scope(task.assigned_to_id for task in tasks)
+            for task in tasks:
+                publish_on_commit(
+                    'task.created', task_event_data(task),
+                    managers=[task.project.assigned_to_id], employees=[task.assigned_to_id]
+                )
+
+        for task in tasks:
+            record_activity('create', task, title=task.title, project_id=task.project_id, status=task.status)
+        return tasks
+
+    def update(self, data):
+        items = self._validate_items(data, partial=True)
+        ids = [item['id'] for item in items]
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError({'non_field_errors': ['Each task may appear only once.']})
+
+        existing = {task.id: task for task in self.scoped_queryset.filter(id__in=ids)}
+        missing = [{'id': ['Not found.']} if pk not in existing else {} for pk in ids]
+        if any(missing):
+            raise serializers.ValidationError(missing)
+        projects, employees = self._resolve(items)
+
+        now = timezone.now()
+        fields = {'updated_at'}
+        manager_ids = set()
+        tasks = []
+        audiences = []
+        project_ids = set()
+        for item in items:
+            task = existing[item['id']]
+            previous_status = task.status
+            project_ids.add(task.project_id)
+            audience = ({task.project.assigned_to_id}, {task.assigned_to_id})
+            self._apply(task, item, projects, employees)
+            audience[0].add(task.project.assigned_to_id)
+            audience[1].add(task.assigned_to_id)
+            project_ids.add(task.project_id)
+            manager_ids.update(audience[0])
+            task.updated_at = now  # bulk_update skips auto_now
+            fields.update(field for field in item if field in BULK_UPDATE_FIELDS)
+            tasks.append((task, previous_status))
+            audiences.append(audience)
+
+        with transaction.atomic():
+            Task.objects.bulk_update([task for task, _ in tasks], sorted(fields))
+            refresh_project_stats(project_ids)
+            if fields & {'title', 'description'}:
+                index_instances(Task, [task for task, _ in tasks])
+            self._invalidate(manager_ids)
+            if fields & {'project', 'assigned_to'}:
+                # Old and new assignees may have gained or lost a project
+                invalidate_access_scope(set().union(*(employees for _, employees in audiences)))
+            for (task, _), (audience_managers, audience_employees) in zip(tasks, audiences):
+                publish_on_commit(
+                    'task.updated', task_event_data(task),
+                    managers=audience_managers, employees=audience_employees
+                )
+
+        for task, previous_status in tasks:
+            details = {'title': task.title, 'project_id': task.project_id, 'status': task.status}
+            if previous_status != task.status:
+                record_activity('status_change', task, from_status=previous_status, **details)
+            else:
+                record_activity('update', task, **details)
+        return [task for task, _ in tasks]
+
+    def set_status(self, data):
+        serializer = BulkStatusSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        new_status = serializer.validated_data['status']
+        if len(ids) > self.limit:
+            raise serializers.ValidationError(
+                {'ids': [f'At most {self.limit} tasks can be sent in one request.']}
+            )
+
+        tasks = list(
+            self.scoped_queryset.filter(id__in=ids)
+            .values('id', 'title', 'status', 'project_id', 'project__assigned_to_id', 'assigned_to_id')
+        )
+        missing = set(ids) - {task['id'] for task in tasks}
+        if missing:
+            raise serializers.ValidationError({'ids': [f'Not found: {sorted(missing)}']})
+
+        changed = [task for task in tasks if task['status'] != new_status]
+        with transaction.atomic():
+            Task.objects.filter(id__in=[task['id'] for task in changed]).update(
+                status=new_status, updated_at=timezone.now()
+            )
+            refresh_project_stats(task['project_id'] for task in changed)
+            self._invalidate(task['project__assigned_to_id'] for task in changed)
+            for task in changed:
+                publish_on_commit(
+                    'task.updated',
+                    {'id': task['id'], 'title': task['title'], 'project_id': task['project_id'], 'status': new_status},
+                    managers=[task['project__assigned_to_id']], employees=[task['assigned_to_id']]
+                )
+
+        for task in changed:
+            record_activity(
+                'status_change', Task(id=task['id']),
+                title=task['title'], project_id=task['project_id'],
+                status=new_status, from_status=task['status']
+            )
+        return len(changed)
@@ -0,0 +1,120 @@
+import asyncio
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import CustomUser, Project
+from .reports import arollup_status_totals, astatus_totals, rollup_status_totals, status_totals
+from .scopes import aaccessible_project_ids, accessible_project_ids
+
+DASHBOARD_STATS_TIMEOUT = getattr(settings, 'DASHBOARD_STATS_TIMEOUT', 300)
+
+
+def _cache_key(scope):
+    # Overdue and active-by-deadline counts depend on the current date, so
+    # the date is part of the key and yesterday's entries simply stop being read.
+    return f'dashboard-stats:{scope}:{timezone.now().date().isoformat()}'
+
+
+def _supermanager_key():
+    return _cache_key('supermanager')
+
+
+def _manager_key(manager_id):
+    return _cache_key(f'manager:{manager_id}')
+
+
+def _status_counts(totals, *extra):
+    fields = ('pending_tasks', 'in_progress_tasks', 'completed_tasks') + extra
+    return {field: totals[field] for field in fields}
+
+
+def _manager_projects(project_ids):
+    today = timezone.now().date()
+    projects = Project.objects.filter(id__in=project_ids)
+    return projects, dict(
+        total_projects=Count('id'),
+        active_projects=Count('id', filter=Q(deadline__gte=today)),
+    )
+
+
+def compute_supermanager_stats():
+    return {
+        'total_users': CustomUser.objects.count(),
+        'active_projects': Project.objects.count(),
+        **_status_counts(rollup_status_totals()),
+    }
+
+
+def compute_manager_stats(manager):
+    project_ids = sorted(accessible_project_ids(manager))
+    projects, project_counts = _manager_projects(project_ids)
+    return {
+        **projects.aggregate(**project_counts),
+        **_status_counts(status_totals(id__in=project_ids), 'overdue_tasks'),
+    }
+
+
+async def acompute_supermanager_stats():
+    total_users, active_projects, task_counts = await asyncio.gather(
+        CustomUser.objects.acount(),
+        Project.objects.acount(),
+        arollup_status_totals(),
+    )
+    return {'total_users': total_users, 'active_projects': active_projects, **_status_counts(task_counts)}
+
+
+async def acompute_manager_stats(manager):
+    project_ids = sorted(await aaccessible_project_ids(manager))
+    projects, project_counts = _manager_projects(project_ids)
+    project_stats, task_stats = await asyncio.gather(
+        projects.aaggregate(**project_counts),
+        astatus_totals(id__in=project_ids),
+    )
+    return {**project_stats, **_status_counts(task_stats, 'overdue_tasks')}
+
+
+def supermanager_stats():
+    key = _supermanager_key()
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_supermanager_stats()
+        cache.set(key, stats, DASHBOARD_STATS_TIMEOUT)
+    return stats
+
+
+def manager_stats(manager):
+    key = _manager_key(manager.id)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_manager_stats(manager)
+        cache.set(key, stats, DASHBOARD_STATS_TIMEOUT)
+    return stats
+
+
+async def asupermanager_stats():
+    key = _supermanager_key()
+    stats = await cache.aget(key)
+    if stats is None:
+        stats = await acompute_supermanager_stats()
+        await cache.aset(key, stats, DASHBOARD_STATS_TIMEOUT)
+    return stats
+
+
+async def amanager_stats(manager):
+    key = _manager_key(manager.id)
+    stats = await cache.aget(key)
+    if stats is None:
+        stats = await acompute_manager_stats(manager)
+        await cache.aset(key, stats, DASHBOARD_STATS_TIMEOUT)
+    return stats
+
+
+def invalidate_dashboard_stats(manager_ids=(), supermanager=True):
+    keys = [_manager_key(manager_id) for manager_id in set(manager_ids) if manager_id]
+    if supermanager:
+        keys.append(_supermanager_key())
+    if keys:
+        cache.delete_many(keys)
@@ -0,0 +1,195 @@
+"""
+Change notifications for the server-sent events stream (api/async/events/).
+
+Signals and the bulk endpoints publish a message after each committed task or
+project write; every open stream subscribes to the configured broker and
+forwards the messages its user is allowed to see. LocalBroker only reaches
+streams served by the same process; RedisBroker fans out across workers.
+
+EventSource cannot send an Authorization header, and an access token in
+the URL would end up in access logs, so a stream is opened with a ticket:
+a random, single-use key from api/events/ticket/ that expires after
+EVENT_STREAM_TICKET_SECONDS.
+"""
+import asyncio
+import json
+import secrets
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.utils.encoders import JSONEncoder
+
+# Messages a slow client may fall behind by before newer ones are dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+EVENT_STREAM_TICKET_SECONDS = getattr(settings, 'EVENT_STREAM_TICKET_SECONDS', 30)
+
+
+class LocalSubscription:
+    def __init__(self, broker):
+        self.broker = broker
+
+    async def __aenter__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.broker._add(self)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.broker._discard(self)
+
+    def deliver(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self, timeout):
+        """The next message, or None if nothing arrived within ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LocalBroker:
+    """In-process pub/sub; publish() may be called from any thread."""
+
+    def __init__(self, url=None):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def _add(self, subscription):
+        with self._lock:
+            self._subscriptions.add(subscription)
+
+    def _discard(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+
+    def subscribe(self):
+        """Async context manager yielding a subscription with ``await get(timeout)``."""
+        return LocalSubscription(self)
+
+
+class RedisSubscription:
+    def __init__(self, broker):
+        self.broker = broker
+
+    async def __aenter__(self):
+        self.client = self.broker._redis.Redis.from_url(self.broker.url)
+        self.pubsub = self.client.pubsub()
+        await self.pubsub.subscribe(self.broker.channel)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.pubsub.unsubscribe(self.broker.channel)
+        await self.pubsub.aclose()
+        await self.client.aclose()
+
+    async def get(self, timeout):
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        return json.loads(message['data']) if message else None
+
+
+class RedisBroker:
+    """Redis pub/sub shared by every worker. Needs the ``redis`` package."""
+
+    channel = 'taskflow-events'
+
+    def __init__(self, url):
+        try:
+            import redis
+            import redis.asyncio
+        except ImportError as exc:
+            raise ImproperlyConfigured('RedisBroker requires the redis package') from exc
+        self.url = url
+        self._redis = redis.asyncio
+        self._client = redis.Redis.from_url(url)
+
+    def publish(self, message):
+        self._client.publish(self.channel, json.dumps(message, cls=JSONEncoder))
+
+    def subscribe(self):
+        return RedisSubscription(self)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            broker_class = import_string(getattr(settings, 'EVENT_BROKER', 'tasks.events.LocalBroker'))
+            _broker = broker_class(getattr(settings, 'EVENT_BROKER_URL', None))
+        return _broker
+
+
+def publish_on_commit(event, data, managers=(), employees=()):
+    """
+    Queue ``event`` for every stream once the current transaction commits.
+    ``managers``/``employees`` are the ids of the users it concerns;
+    supermanagers receive everything.
+    """
+    message = {
+        'event': event,
+        'data': dict(data, timestamp=timezone.now()),
+        'managers': sorted({pk for pk in managers if pk}),
+        'employees': sorted({pk for pk in employees if pk}),
+    }
+    # Round-trip through JSON now so both brokers deliver the same payload
+    message = json.loads(json.dumps(message, cls=JSONEncoder))
+    transaction.on_commit(lambda: get_broker().publish(message))
+
+
+def _ticket_key(ticket):
+    return f'event-stream-ticket:{ticket}'
+
+
+def issue_stream_ticket(access_token):
+    """A ticket that opens one stream as the holder of ``access_token``."""
+    ticket = secrets.token_urlsafe(32)
+    cache.set(_ticket_key(ticket), str(access_token), EVENT_STREAM_TICKET_SECONDS)
+    return ticket
+
+
+async def aredeem_stream_ticket(ticket):
+    """The access token behind ``ticket``, or None; a ticket is only accepted once."""
+    key = _ticket_key(ticket)
+    access_token = await cache.aget(key)
+    # Only the request whose delete removed the entry may use it
+    if access_token is None or not await cache.adelete(key):
+        return None
+    return access_token
+
+
+def task_event_data(task):
+    return {'id': task.pk, 'title': task.title, 'project_id': task.project_id, 'status': task.status}
+
+
+def project_event_data(project):
+    return {'id': project.pk, 'name': project.name, 'assigned_to_id': project.assigned_to_id}
+
+
+def visible_to(message, user):
+    if user.role == 'supermanager':
+        return True
+    if user.role == 'manager':
+        return user.id in message['managers']
+    return user.id in message['employees']
+
+
+def format_event(message):
+    return f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n"
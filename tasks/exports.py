@@ -0,0 +1,119 @@
+import csv
+import json
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .reports import annotate_project_progress, project_progress
+from .serializers import TASK_ROW_FIELDS, task_row_to_representation
+
+EXPORT_CHUNK_SIZE = 2000
+
+TASK_CSV_COLUMNS = [
+    'id', 'title', 'description', 'status', 'display_status', 'is_overdue',
+    'project', 'project_name', 'assigned_to', 'assigned_to_username',
+    'assigned_to_full_name', 'assigned_by', 'created_at', 'due_date', 'updated_at',
+]
+
+PROJECT_PROGRESS_COLUMNS = ['id', 'name', 'progress', 'total_tasks', 'completed_tasks']
+
+
+class Echo:
+    """File-like object whose write() just hands the line back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def served_over_asgi(request):
+    # DRF's Request wraps the HttpRequest the handler built
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+def _lines(header, encode, rows):
+    if header is not None:
+        yield header
+    for row in rows:
+        yield encode(row)
+
+
+async def _alines(header, encode, rows):
+    if header is not None:
+        yield header
+    async for row in rows:
+        yield encode(row)
+
+
+def streaming_export(queryset, to_item, output, filename, columns, flatten=None, asynchronous=False):
+    """
+    Stream the rows of ``queryset`` (a values() queryset), mapped through
+    ``to_item``, as NDJSON or CSV. Nothing is buffered beyond the current
+    database chunk, so memory use does not depend on how many rows are
+    exported.
+
+    Under ASGI Django buffers a sync iterator whole before sending it, so
+    ``asynchronous`` streams from QuerySet.aiterator() instead.
+    """
+    if asynchronous:
+        rows = queryset.aiterator(chunk_size=EXPORT_CHUNK_SIZE)
+    else:
+        rows = queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    if output == 'csv':
+        writer = csv.writer(Echo())
+        header = writer.writerow(columns)
+
+        def encode(row):
+            item = to_item(row)
+            if flatten:
+                item = flatten(item)
+            return writer.writerow([item[column] for column in columns])
+
+        content_type, extension = 'text/csv', 'csv'
+    else:
+        header = None
+
+        def encode(row):
+            return json.dumps(to_item(row)) + '\n'
+
+        content_type, extension = 'application/x-ndjson', 'ndjson'
+
+    lines = (_alines if asynchronous else _lines)(header, encode, rows)
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+    return response
+
+
+def _flatten_task(task):
+    return {
+        **task,
+        'assigned_to_username': task['assigned_to_details']['username'],
+        'assigned_to_full_name': task['assigned_to_details']['full_name'],
+    }
+
+
+def export_tasks(queryset, output, asynchronous=False):
+    today = timezone.now().date()
+    return streaming_export(
+        queryset.values(*TASK_ROW_FIELDS),
+        lambda row: task_row_to_representation(row, today),
+        output, 'tasks', TASK_CSV_COLUMNS, flatten=_flatten_task, asynchronous=asynchronous,
+    )
+
+
+def _progress_item(row):
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'progress': project_progress(row['total_tasks'], row['completed_tasks']),
+        'total_tasks': row['total_tasks'],
+        'completed_tasks': row['completed_tasks'],
+    }
+
+
+def export_project_progress(projects_queryset, output, asynchronous=False):
+    rows = annotate_project_progress(projects_queryset).values('id', 'name', 'total_tasks', 'completed_tasks')
+    return streaming_export(
+        rows, _progress_item, output, 'project-progress', PROJECT_PROGRESS_COLUMNS, asynchronous=asynchronous,
+    )
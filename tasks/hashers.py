@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with the iteration count taken from settings.PBKDF2_ITERATIONS.
+
+    It keeps Django's ``pbkdf2_sha256`` algorithm name, so existing hashes
+    still verify. Hashes made with a different count are rewritten on the
+    next successful login (must_update compares iterations).
+    """
+    iterations = getattr(settings, 'PBKDF2_ITERATIONS', None) or PBKDF2PasswordHasher.iterations
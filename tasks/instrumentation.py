@@ -0,0 +1,225 @@
+"""
+Per-request query count, database time, view time, render time and
+response size.
+
+View time runs from the call into the view until it returns, so it covers
+serialization (serializer.data, serialize_task_rows) along with the view's
+queries; render time is the DRF renderer encoding that data afterwards.
+
+RequestMetricsMiddleware times each request and adds the figures as a
+Server-Timing header (visible in the browser's network panel), and
+folds them into an in-process histogram per view that supermanagers can
+read at api/metrics/. Queries are counted by an execute wrapper installed
+on every database connection as it opens; the wrapper finds the current
+request through a context variable, which asgiref carries into
+sync_to_async threads, so async views are measured too.
+
+The cost is a couple of perf_counter() calls per query and a dictionary
+update per request. Streaming responses are measured up to the point
+their headers are sent. Each worker process keeps its own histogram.
+"""
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils import timezone
+
+# Upper bounds (ms) of the request latency buckets; the last one is open-ended
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'db_time', 'view_start', 'view_time', 'render_start', 'render_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.view_start = None
+        self.view_time = None
+        self.render_start = None
+        self.render_time = 0.0
+
+    def view_returned(self):
+        if self.view_start is not None and self.view_time is None:
+            self.view_time = time.perf_counter() - self.view_start
+
+
+def count_queries(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += time.perf_counter() - start
+        metrics.queries += 1
+
+
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+class ViewStats:
+    def __init__(self):
+        self.requests = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_ms = 0.0
+        self.view_ms = 0.0
+        self.render_ms = 0.0
+        self.bytes = 0
+
+    def add(self, total_ms, metrics, size):
+        self.requests += 1
+        self.buckets[_bucket(total_ms)] += 1
+        self.total_ms += total_ms
+        self.max_ms = max(self.max_ms, total_ms)
+        self.queries += metrics.queries
+        self.max_queries = max(self.max_queries, metrics.queries)
+        self.db_ms += metrics.db_time * 1000
+        self.view_ms += (metrics.view_time or 0) * 1000
+        self.render_ms += metrics.render_time * 1000
+        self.bytes += size or 0
+
+    def as_dict(self):
+        requests = self.requests or 1
+        labels = [f'le_{bound}' for bound in LATENCY_BUCKETS] + ['gt_%d' % LATENCY_BUCKETS[-1]]
+        return {
+            'requests': self.requests,
+            'latency_ms': dict(zip(labels, self.buckets)),
+            'avg_ms': round(self.total_ms / requests, 2),
+            'max_ms': round(self.max_ms, 2),
+            'avg_queries': round(self.queries / requests, 2),
+            'max_queries': self.max_queries,
+            'avg_db_ms': round(self.db_ms / requests, 2),
+            'avg_view_ms': round(self.view_ms / requests, 2),
+            'avg_render_ms': round(self.render_ms / requests, 2),
+            'avg_bytes': round(self.bytes / requests),
+        }
+
+
+def _bucket(total_ms):
+    for index, bound in enumerate(LATENCY_BUCKETS):
+        if total_ms <= bound:
+            return index
+    return len(LATENCY_BUCKETS)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._views = {}
+            self.since = timezone.now()
+
+    def record(self, view_name, total_ms, metrics, size):
+        with self._lock:
+            stats = self._views.get(view_name)
+            if stats is None:
+                stats = self._views[view_name] = ViewStats()
+            stats.add(total_ms, metrics, size)
+
+    def snapshot(self):
+        with self._lock:
+            views = {name: stats.as_dict() for name, stats in sorted(self._views.items())}
+        return {'since': self.since, 'buckets_ms': LATENCY_BUCKETS, 'views': views}
+
+
+registry = MetricsRegistry()
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    return match.view_name or match._func_path
+
+
+def _response_size(response):
+    if response.streaming:
+        return None
+    return len(response.content)
+
+
+def server_timing(total_ms, metrics):
+    return (
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries", '
+        f'view;dur={(metrics.view_time or 0) * 1000:.1f};desc="view and serialization", '
+        f'render;dur={metrics.render_time * 1000:.1f}, '
+        f'total;dur={total_ms:.1f}'
+    )
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'REQUEST_METRICS_SERVER_TIMING', True)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # DRF responses render after the view returns; time the rendering
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.view_returned()
+            metrics.render_start = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: self.rendered(metrics))
+        return response
+
+    @staticmethod
+    def rendered(metrics):
+        metrics.render_time = time.perf_counter() - metrics.render_start
+
+    def finish(self, request, response, metrics, start):
+        # Responses that skip rendering end their view time here
+        metrics.view_returned()
+        total_ms = (time.perf_counter() - start) * 1000
+        registry.record(_view_name(request), total_ms, metrics, _response_size(response))
+        if self.server_timing:
+            response['Server-Timing'] = server_timing(total_ms, metrics)
+        return response
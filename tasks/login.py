@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.cache import cache
+
+LOGIN_MAX_FAILURES = getattr(settings, 'LOGIN_MAX_FAILURES', 5)
+LOGIN_LOCKOUT_SECONDS = getattr(settings, 'LOGIN_LOCKOUT_SECONDS', 300)
+
+
+class LoginAttemptGuard:
+    """
+    Per-username count of recent failed logins, kept in the cache. Once a
+    username reaches LOGIN_MAX_FAILURES, further attempts are refused before
+    the password hasher runs, until LOGIN_LOCKOUT_SECONDS pass without a
+    new failure.
+    """
+
+    def __init__(self, username):
+        self.key = f'login-failures:{(username or "").lower()}'
+
+    def is_locked(self):
+        return cache.get(self.key, 0) >= LOGIN_MAX_FAILURES
+
+    def record_failure(self):
+        if not cache.add(self.key, 1, LOGIN_LOCKOUT_SECONDS):
+            try:
+                cache.incr(self.key)
+            except ValueError:  # expired between add() and incr()
+                cache.set(self.key, 1, LOGIN_LOCKOUT_SECONDS)
+            else:
+                cache.touch(self.key, LOGIN_LOCKOUT_SECONDS)
+
+    def reset(self):
+        cache.delete(self.key)
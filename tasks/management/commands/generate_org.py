@@ -0,0 +1,56 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.models import CustomUser
+from tasks.synthetic import generate_org
+
+
+class Command(BaseCommand):
+    help = "Generate a deterministic synthetic organisation (users, projects, tasks, activity)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--supermanagers', type=int, default=2)
+        parser.add_argument('--managers', type=int, default=10)
+        parser.add_argument('--employees', type=int, default=100)
+        parser.add_argument('--projects', type=int, default=50)
+        parser.add_argument('--tasks', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0, help="Random seed; the same seed gives the same data.")
+        parser.add_argument(
+            '--prefix', default='org',
+            help="Prefix for usernames and emails, so several organisations can share a database.",
+        )
+        parser.add_argument(
+            '--password', help="Password for every generated user; by default they cannot log in.",
+        )
+        parser.add_argument(
+            '--today', help="Reference day (YYYY-MM-DD) that dates are generated around; defaults to today.",
+        )
+
+    def handle(self, *args, today=None, **options):
+        if today:
+            try:
+                today = date.fromisoformat(today)
+            except ValueError:
+                raise CommandError("--today must be YYYY-MM-DD")
+        for role in ('supermanagers', 'managers', 'employees'):
+            if options[role] < 1:
+                raise CommandError(f"--{role} must be at least 1")
+        if options['tasks'] and not options['projects']:
+            raise CommandError("--tasks needs at least one project")
+        if CustomUser.objects.filter(username__startswith=f"{options['prefix']}-").exists():
+            raise CommandError(f"Users with prefix {options['prefix']!r} already exist; pick another --prefix.")
+
+        counts = generate_org(
+            supermanagers=options['supermanagers'],
+            managers=options['managers'],
+            employees=options['employees'],
+            projects=options['projects'],
+            tasks=options['tasks'],
+            seed=options['seed'],
+            prefix=options['prefix'],
+            password=options['password'],
+            today=today,
+        )
+        summary = ', '.join(f"{count} {name}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Generated {summary}."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.rollups import rebuild_project_stats, verify_project_stats
+
+
+class Command(BaseCommand):
+    help = "Recount the ProjectStats rollup from the Task table and verify the result."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Only compare the rollup with a fresh count; exit non-zero on mismatches.",
+        )
+
+    def handle(self, *args, check=False, **options):
+        if not check:
+            rebuilt = rebuild_project_stats()
+            self.stdout.write(f"Rebuilt stats for {rebuilt} projects.")
+
+        mismatches = verify_project_stats()
+        for project_id, stored, expected in mismatches:
+            self.stderr.write(f"Project {project_id}: stored {stored}, expected {expected}")
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} projects have stale stats.")
+        self.stdout.write(self.style.SUCCESS("Project stats match the task table."))
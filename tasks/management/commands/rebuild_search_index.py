@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tasks.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Repopulate the full-text search tables from the Task and Project tables."
+
+    def handle(self, *args, **options):
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.snapshots import take_snapshot
+
+
+class Command(BaseCommand):
+    help = "Record today's task counts per project and assignee for trend reports. Run once a day."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', dest='day', help="Day to record (YYYY-MM-DD); must be today, since past days can't be recounted.")
+        parser.add_argument(
+            '--full', action='store_true',
+            help="Recount every project instead of only those changed since the previous snapshot.",
+        )
+
+    def handle(self, *args, day=None, full=False, **options):
+        if day:
+            try:
+                day = date.fromisoformat(day)
+            except ValueError:
+                raise CommandError("--date must be YYYY-MM-DD")
+
+        try:
+            groups, recounted = take_snapshot(day, full=full)
+        except ValueError as e:
+            raise CommandError(str(e))
+        scope = "all projects" if recounted is None else f"{recounted} changed projects"
+        self.stdout.write(self.style.SUCCESS(f"Recorded {groups} groups; recounted {scope}."))
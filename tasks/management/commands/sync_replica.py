@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = "Copy the default SQLite database into the SQLite file standing in as the read replica."
+
+    def handle(self, *args, **options):
+        alias = settings.REPLICA_DATABASE
+        if not alias:
+            raise CommandError("No replica configured; set SQLITE_REPLICA_PATH.")
+        source, target = connections['default'], connections[alias]
+        if source.vendor != 'sqlite' or target.vendor != 'sqlite':
+            raise CommandError("Only a SQLite stand-in replica can be synced; real replicas replicate themselves.")
+
+        source.ensure_connection()
+        target.ensure_connection()
+        # Online backup: consistent even while the primary is being written to
+        source.connection.backup(target.connection)
+        self.stdout.write(self.style.SUCCESS(
+            f"Copied {source.settings_dict['NAME']} to {target.settings_dict['NAME']}."
+        ))
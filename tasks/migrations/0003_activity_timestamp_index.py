@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_alter_task_description'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='activity',
+            options={'ordering': ['-timestamp', '-id'], 'verbose_name_plural': 'Activities'},
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['timestamp', 'id'], name='activity_timestamp_id_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_project_stats(apps, schema_editor):
+    Project = apps.get_model('tasks', 'Project')
+    ProjectStats = apps.get_model('tasks', 'ProjectStats')
+    counts = Project.objects.values('id').annotate(
+        total_tasks=Count('tasks'),
+        pending_tasks=Count('tasks', filter=Q(tasks__status='pending')),
+        in_progress_tasks=Count('tasks', filter=Q(tasks__status='in_progress')),
+        completed_tasks=Count('tasks', filter=Q(tasks__status='completed')),
+    )
+    ProjectStats.objects.bulk_create(
+        ProjectStats(project_id=row.pop('id'), **row) for row in counts.iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_user_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectStats',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='tasks.project')),
+                ('total_tasks', models.PositiveIntegerField(default=0)),
+                ('pending_tasks', models.PositiveIntegerField(default=0)),
+                ('in_progress_tasks', models.PositiveIntegerField(default=0)),
+                ('completed_tasks', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Project stats',
+            },
+        ),
+        migrations.RunPython(populate_project_stats, migrations.RunPython.noop),
+    ]
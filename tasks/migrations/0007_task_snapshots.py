@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:25
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_project_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total_tasks', models.PositiveIntegerField(default=0)),
+                ('pending_tasks', models.PositiveIntegerField(default=0)),
+                ('in_progress_tasks', models.PositiveIntegerField(default=0)),
+                ('completed_tasks', models.PositiveIntegerField(default=0)),
+                ('overdue_tasks', models.PositiveIntegerField(default=0)),
+                ('recorded_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('assigned_to', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_snapshots', to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='tasks.project')),
+            ],
+            options={
+                'ordering': ['date'],
+                'indexes': [models.Index(fields=['project', 'date'], name='snapshot_project_date_idx'), models.Index(fields=['assigned_to', 'date'], name='snapshot_assignee_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'project', 'assigned_to'), name='snapshot_day_group_unique')],
+            },
+        ),
+    ]
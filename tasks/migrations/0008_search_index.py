@@ -0,0 +1,50 @@
+from django.db import migrations
+
+SEARCH_FIELDS = {
+    'task': ('task_search', 'tasks_task', ('title', 'description')),
+    'project': ('project_search', 'tasks_project', ('name', 'description')),
+}
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        # FTS5 tables keyed by the Task/Project id; tasks.search keeps them in sync
+        for table, source, fields in SEARCH_FIELDS.values():
+            columns = ', '.join(fields)
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {table} USING fts5({columns}, prefix='2 3', "
+                f"tokenize='unicode61 remove_diacritics 2')"
+            )
+            selected = ', '.join(f"COALESCE({field}, '')" for field in fields)
+            schema_editor.execute(f'INSERT INTO {table} (rowid, {columns}) SELECT id, {selected} FROM {source}')
+    elif vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+
+        for model_name, (table, _, fields) in SEARCH_FIELDS.items():
+            model = apps.get_model('tasks', model_name)
+            schema_editor.add_index(
+                model, GinIndex(SearchVector(*fields, config='english'), name=f'{model_name}_search_idx')
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for table, _, _ in SEARCH_FIELDS.values():
+            schema_editor.execute(f'DROP TABLE IF EXISTS {table}')
+    elif vendor == 'postgresql':
+        for model_name in SEARCH_FIELDS:
+            schema_editor.execute(f'DROP INDEX IF EXISTS {model_name}_search_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_task_snapshots'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
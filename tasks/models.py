@@ -1,5 +1,6 @@
 
 from django.db import models
+from django.contrib.auth.hashers import acheck_password, check_password
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.utils import timezone
 
@@ -40,18 +41,50 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     date_joined = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
 
     objects = CustomUserManager()
 
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['email']
 
+    # Set while check_password() saves a hasher upgrade, which keeps the same
+    # secret; a real password change revokes outstanding tokens, this doesn't
+    _password_rehashed = False
+
     def __str__(self):
         return f"{self.full_name} ({self.role})"
 
+    def _rehash(self, raw_password):
+        self.set_password(raw_password)
+        self._password = None
+        self._password_rehashed = True
+
+    def check_password(self, raw_password):
+        def setter(raw_password):
+            self._rehash(raw_password)
+            try:
+                self.save(update_fields=['password'])
+            finally:
+                self._password_rehashed = False
+        return check_password(raw_password, self.password, setter)
+
+    async def acheck_password(self, raw_password):
+        async def setter(raw_password):
+            self._rehash(raw_password)
+            try:
+                await self.asave(update_fields=['password'])
+            finally:
+                self._password_rehashed = False
+        return await acheck_password(raw_password, self.password, setter)
+
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            models.Index(fields=['-date_joined'], name='user_date_joined_idx'),
+            models.Index(fields=['role'], name='user_role_idx'),
+        ]
 
 # Now define Project which references CustomUser
 class Project(models.Model):
@@ -77,6 +110,13 @@ class Project(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Manager project listings and dashboards
+            models.Index(fields=['assigned_to', '-created_at'], name='project_manager_created_idx'),
+            models.Index(fields=['-created_at'], name='project_created_idx'),
+            # Recent activity window
+            models.Index(fields=['updated_at'], name='project_updated_idx'),
+        ]
 
 # Then define Task which references both Project and CustomUser
 class Task(models.Model):
@@ -118,6 +158,78 @@ class Task(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Default list ordering and the "created recently" activity window
+            models.Index(fields=['-created_at'], name='task_created_idx'),
+            # Per-project status counts (reports, manager dashboard, project filter)
+            models.Index(fields=['project', 'status'], name='task_project_status_idx'),
+            # Employee task list
+            models.Index(fields=['assigned_to', '-created_at'], name='task_assignee_created_idx'),
+            # Status counts and the "completed recently" activity window
+            models.Index(fields=['status', 'updated_at'], name='task_status_updated_idx'),
+            # ?ordering=-updated_at on the task lists
+            models.Index(fields=['-updated_at'], name='task_updated_idx'),
+            # ?due_from= / ?due_to= ranges, completed tasks included
+            models.Index(fields=['due_date'], name='task_due_date_idx'),
+            # Overdue predicate: due_date < today AND status != 'completed'
+            models.Index(
+                fields=['due_date'],
+                condition=~models.Q(status='completed'),
+                name='task_open_due_date_idx',
+            ),
+        ]
+
+
+class ProjectStats(models.Model):
+    """
+    Task counts per project, kept current by the Task signals (see
+    tasks.rollups) so reports and dashboards don't count the Task table.
+    Overdue counts depend on the date and are not stored.
+    """
+    project = models.OneToOneField(Project, related_name='stats', on_delete=models.CASCADE, primary_key=True)
+    total_tasks = models.PositiveIntegerField(default=0)
+    pending_tasks = models.PositiveIntegerField(default=0)
+    in_progress_tasks = models.PositiveIntegerField(default=0)
+    completed_tasks = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Project stats'
+
+    def __str__(self):
+        return f"{self.project_id}: {self.completed_tasks}/{self.total_tasks} completed"
+
+
+class TaskSnapshot(models.Model):
+    """
+    Task counts per (project, assignee) as of one day, written by
+    manage.py snapshot_tasks. Trend reports read these instead of Task.
+    """
+    date = models.DateField()
+    project = models.ForeignKey(Project, related_name='snapshots', on_delete=models.CASCADE)
+    assigned_to = models.ForeignKey(CustomUser, related_name='task_snapshots', on_delete=models.CASCADE)
+    total_tasks = models.PositiveIntegerField(default=0)
+    pending_tasks = models.PositiveIntegerField(default=0)
+    in_progress_tasks = models.PositiveIntegerField(default=0)
+    completed_tasks = models.PositiveIntegerField(default=0)
+    overdue_tasks = models.PositiveIntegerField(default=0)
+    recorded_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'project', 'assigned_to'], name='snapshot_day_group_unique'),
+        ]
+        indexes = [
+            # Per-project and per-assignee series over a date range
+            models.Index(fields=['project', 'date'], name='snapshot_project_date_idx'),
+            models.Index(fields=['assigned_to', 'date'], name='snapshot_assignee_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date}: project {self.project_id}, user {self.assigned_to_id}"
+
+
 class Activity(models.Model):
     ACTION_CHOICES = [
         ('create', 'Create'),
@@ -135,5 +247,8 @@ class Activity(models.Model):
     
     class Meta:
         verbose_name_plural = 'Activities'
-        ordering = ['-timestamp']# Add to Task model
+        ordering = ['-timestamp', '-id']
+        indexes = [
+            models.Index(fields=['timestamp', 'id'], name='activity_timestamp_id_idx'),
+        ]# Add to Task model
 # Add to Task model
@@ -0,0 +1,67 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+API_PAGE_SIZE = getattr(settings, 'API_PAGE_SIZE', 50)
+API_MAX_PAGE_SIZE = getattr(settings, 'API_MAX_PAGE_SIZE', 200)
+
+
+class ActivityFeedPagination(CursorPagination):
+    # Keyset pagination over the (timestamp, id) index
+    ordering = ('-timestamp', '-id')
+    page_size = API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = API_MAX_PAGE_SIZE
+
+
+class OptInCursorPagination(CursorPagination):
+    """
+    Cursor pagination on (created_at, id) that only kicks in when the client
+    sends ?cursor= or ?page_size=; other requests keep getting a plain list.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = API_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class UserCursorPagination(OptInCursorPagination):
+    ordering = ('-date_joined', '-id')
+
+
+class SearchPagination(LimitOffsetPagination):
+    """
+    ?limit=/?offset= over ranked search results. Counting every match would
+    cost more than the page itself, so one extra row is fetched instead to
+    tell whether there is a next page.
+    """
+    default_limit = API_PAGE_SIZE
+    max_limit = API_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        rows = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        return rows[:self.limit]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = replace_query_param(self.request.build_absolute_uri(), self.limit_query_param, self.limit)
+        return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
@@ -0,0 +1,169 @@
+import asyncio
+
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Project, ProjectStats, Task
+
+
+def overdue_q(prefix=''):
+    # Same predicate as Task.is_overdue, expressed in SQL
+    return Q(**{f'{prefix}due_date__lt': timezone.now().date()}) & ~Q(**{f'{prefix}status': 'completed'})
+
+
+def annotate_project_progress(queryset):
+    """Add total_tasks / completed_tasks from the ProjectStats rollup (a primary-key join)."""
+    return queryset.annotate(
+        total_tasks=Coalesce(F('stats__total_tasks'), 0),
+        completed_tasks=Coalesce(F('stats__completed_tasks'), 0),
+    )
+
+
+def project_progress(total, completed):
+    if total > 0:
+        return (completed / total) * 100
+    return 0
+
+
+def _project_lookups(project_lookups):
+    return {f'project__{lookup}': value for lookup, value in project_lookups.items()}
+
+
+def _rollup_totals():
+    return {
+        field: Coalesce(Sum(field), 0)
+        for field in ('total_tasks', 'completed_tasks', 'pending_tasks', 'in_progress_tasks')
+    }
+
+
+def rollup_queryset(**project_lookups):
+    """ProjectStats rows of the projects matching ``project_lookups``."""
+    return ProjectStats.objects.filter(**_project_lookups(project_lookups))
+
+
+def overdue_queryset(**project_lookups):
+    # Served by the partial index on open tasks' due_date
+    return Task.objects.filter(overdue_q(), **_project_lookups(project_lookups))
+
+
+def rollup_status_totals(**project_lookups):
+    """Status counts (no overdue) summed from the rollup."""
+    return rollup_queryset(**project_lookups).aggregate(**_rollup_totals())
+
+
+async def arollup_status_totals(**project_lookups):
+    return await rollup_queryset(**project_lookups).aaggregate(**_rollup_totals())
+
+
+def status_totals(**project_lookups):
+    """
+    Status and overdue counts over the projects matching ``project_lookups``
+    (e.g. ``id=3`` or ``assigned_to_id=5``): status counts are summed from the
+    rollup, overdue tasks are counted through the partial index.
+    """
+    totals = rollup_status_totals(**project_lookups)
+    totals['overdue_tasks'] = overdue_queryset(**project_lookups).count()
+    return totals
+
+
+async def astatus_totals(**project_lookups):
+    totals, overdue = await asyncio.gather(
+        arollup_status_totals(**project_lookups),
+        overdue_queryset(**project_lookups).acount(),
+    )
+    return dict(totals, overdue_tasks=overdue)
+
+
+def _report_querysets(project_id=None):
+    lookups = {'id': project_id} if project_id else {}
+    projects_queryset = annotate_project_progress(Project.objects.filter(**lookups)).values(
+        'id', 'name', 'total_tasks', 'completed_tasks'
+    )
+    return lookups, projects_queryset
+
+
+def _assemble_report(stats, projects, all_projects):
+    projects_progress = [
+        {
+            'id': project['id'],
+            'name': project['name'],
+            'progress': project_progress(project['total_tasks'], project['completed_tasks']),
+            'total_tasks': project['total_tasks'],
+            'completed_tasks': project['completed_tasks'],
+        }
+        for project in projects
+    ]
+    if all_projects is None:
+        all_projects = [{'id': p['id'], 'name': p['name']} for p in projects]
+
+    return {
+        'stats': stats,
+        'statusDistribution': {
+            'labels': ['Pending', 'In Progress', 'Completed', 'Overdue'],
+            'data': [
+                stats['pending_tasks'],
+                stats['in_progress_tasks'],
+                stats['completed_tasks'],
+                stats['overdue_tasks'],
+            ]
+        },
+        'projectsProgress': projects_progress,
+        'allProjects': all_projects,
+    }
+
+
+def build_report(project_id=None):
+    """
+    Data for ReportView. Runs a constant number of queries regardless of
+    how many projects or tasks exist: two for the stats block (rollup sum and
+    overdue count), one for per-project progress from the rollup and one for
+    the project dropdown when a project filter is applied.
+    """
+    lookups, projects_queryset = _report_querysets(project_id)
+    stats = status_totals(**lookups)
+    projects = list(projects_queryset)
+    all_projects = list(Project.objects.values('id', 'name')) if project_id else None
+    return _assemble_report(stats, projects, all_projects)
+
+
+async def abuild_report(project_id=None):
+    """Async build_report(): the independent queries run concurrently."""
+    lookups, projects_queryset = _report_querysets(project_id)
+
+    async def all_projects():
+        if not project_id:
+            return None
+        return [project async for project in Project.objects.values('id', 'name').aiterator()]
+
+    stats, projects, all_projects = await asyncio.gather(
+        astatus_totals(**lookups),
+        _alist(projects_queryset),
+        all_projects(),
+    )
+    return _assemble_report(stats, projects, all_projects)
+
+
+async def _alist(queryset):
+    return [row async for row in queryset.aiterator()]
+
+
+TREND_FIELDS = ('total_tasks', 'pending_tasks', 'in_progress_tasks', 'completed_tasks', 'overdue_tasks')
+
+
+def trend_series(snapshots, start, end):
+    """
+    Daily totals between ``start`` and ``end`` (inclusive) summed from a
+    TaskSnapshot queryset; days without a snapshot are left out.
+    """
+    rows = (
+        snapshots.filter(date__range=(start, end))
+        .values('date')
+        .annotate(**{field: Sum(field) for field in TREND_FIELDS})
+        .order_by('date')
+    )
+    rows = list(rows)
+    return {
+        'labels': [row['date'] for row in rows],
+        'series': {field: [row[field] for row in rows] for field in TREND_FIELDS},
+    }
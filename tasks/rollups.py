@@ -0,0 +1,111 @@
+"""
+Maintenance of the ProjectStats rollup. Single-task writes adjust counters
+with F() expressions from the Task signals, inside the writing transaction
+(the viewsets wrap each write in one; see AtomicWritesMixin), so concurrent
+writers never overwrite each other's increments and a failed counter update
+rolls the task write back with it. Bulk writes
+recompute the projects they touched; rebuild_project_stats() recomputes
+everything (manage.py rebuild_project_stats).
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Project, ProjectStats, Task
+
+STATUS_COUNTERS = {status: f'{status}_tasks' for status, _ in Task.STATUS_CHOICES}
+COUNTER_FIELDS = ('total_tasks',) + tuple(STATUS_COUNTERS.values())
+
+
+def _counter_updates(status, delta):
+    return {
+        'total_tasks': F('total_tasks') + delta,
+        STATUS_COUNTERS[status]: F(STATUS_COUNTERS[status]) + delta,
+    }
+
+
+def apply_task_change(old=None, new=None):
+    """
+    Move one task's contribution from ``old`` to ``new``, each a
+    (project_id, status) pair or None for a created/deleted task.
+    """
+    if old == new:
+        return
+    now = timezone.now()
+    for change, delta in ((old, -1), (new, 1)):
+        if change is None:
+            continue
+        project_id, status = change
+        updated = ProjectStats.objects.filter(project_id=project_id).update(
+            updated_at=now, **_counter_updates(status, delta)
+        )
+        # Projects created before the rollup existed (or through raw/bulk
+        # inserts) have no row yet; count them from scratch instead. Not on
+        # delete, where the project itself may be going away.
+        if not updated and delta > 0:
+            refresh_project_stats([project_id])
+
+
+def computed_project_stats(project_ids=None):
+    """{project_id: {counter: value}} counted from the Task table."""
+    projects = Project.objects.all()
+    if project_ids is not None:
+        projects = projects.filter(id__in=project_ids)
+    counts = dict(total_tasks=Count('tasks'))
+    counts.update(
+        (field, Count('tasks', filter=Q(tasks__status=status))) for status, field in STATUS_COUNTERS.items()
+    )
+    return {row.pop('id'): row for row in projects.values('id').annotate(**counts)}
+
+
+def _recount(project_ids=None):
+    # Lock the rows before counting: concurrent F() updates then either
+    # committed before the count (and are included) or apply on top of it.
+    # Must run inside a transaction, which the counts are written in too.
+    rows = ProjectStats.objects.select_for_update()
+    if project_ids is not None:
+        rows = rows.filter(project_id__in=project_ids)
+    existing = {stats.project_id: stats for stats in rows}
+    computed = computed_project_stats(project_ids)
+    now = timezone.now()
+    updated, created = [], []
+    for project_id, counts in computed.items():
+        stats = existing.get(project_id) or ProjectStats(project_id=project_id)
+        for field, value in counts.items():
+            setattr(stats, field, value)
+        stats.updated_at = now  # bulk_update skips auto_now
+        (updated if project_id in existing else created).append(stats)
+    ProjectStats.objects.bulk_update(updated, COUNTER_FIELDS + ('updated_at',))
+    ProjectStats.objects.bulk_create(created)
+    return len(computed)
+
+
+def refresh_project_stats(project_ids):
+    """Recount the given projects, e.g. after bulk writes that skip the signals."""
+    project_ids = {pk for pk in project_ids if pk}
+    if not project_ids:
+        return
+    with transaction.atomic(savepoint=False):
+        _recount(project_ids)
+
+
+def rebuild_project_stats():
+    """Recount the whole rollup in one transaction; returns the number of projects."""
+    with transaction.atomic():
+        return _recount()
+
+
+def verify_project_stats():
+    """
+    Compare the rollup with a fresh count. Returns a list of
+    (project_id, stored, expected) for every project that differs.
+    """
+    stored = {
+        row.pop('project_id'): row
+        for row in ProjectStats.objects.values('project_id', *COUNTER_FIELDS)
+    }
+    return [
+        (project_id, stored.get(project_id), expected)
+        for project_id, expected in sorted(computed_project_stats().items())
+        if stored.get(project_id) != expected
+    ]
@@ -0,0 +1,126 @@
+"""
+Read-replica routing. With settings.REPLICA_DATABASE set, the read-only
+views (dashboards, reports, activity, search, the async endpoints) and GET
+list actions read from that alias; everything else, and every write, uses
+default. Without a replica all queries go to default.
+
+Reads stay on the primary once the request has written anything, and for
+REPLICA_PIN_SECONDS after a write the same client (identified by its
+Authorization header) keeps reading from the primary, so a list fetched
+right after an edit never misses the edit because of replication lag.
+
+Dashboard counters computed from the replica are cached like any other;
+with a lagging replica they can trail the last write until the next write
+invalidates them. Streaming exports run after the response is returned
+and read from the primary.
+"""
+import hashlib
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+_state = ContextVar('replica_routing', default=None)
+
+REPLICA_METHODS = ('GET', 'HEAD')
+
+
+class RoutingState:
+    __slots__ = ('use_replica', 'wrote')
+
+    def __init__(self):
+        self.use_replica = False
+        self.wrote = False
+
+
+def replica_alias():
+    alias = getattr(settings, 'REPLICA_DATABASE', None)
+    return alias if alias and alias in connections else None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replica or state.wrote:
+            return None
+        if model._meta.app_label == 'django_cache':
+            # A database cache holds the token deny-list; a lagging copy won't do
+            return None
+        return replica_alias()
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as default
+        return True
+
+
+def _pin_key(request):
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if not authorization:
+        return None
+    return 'replica-pin:' + hashlib.sha256(authorization.encode()).hexdigest()
+
+
+def reads_from_replica(request, view_func):
+    """Whether ``view_func`` may answer ``request`` from the replica."""
+    if request.method not in REPLICA_METHODS or replica_alias() is None:
+        return False
+    key = _pin_key(request)
+    if key and cache.get(key):
+        return False
+    actions = getattr(view_func, 'actions', None)
+    if actions and actions.get(request.method.lower()) == 'list':
+        return True
+    view_class = getattr(view_func, 'cls', None)
+    return getattr(view_func, 'replica_reads', False) or getattr(view_class, 'replica_reads', False)
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        self.pin_after_write(request, state)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        self.pin_after_write(request, state)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # May run in another thread for async requests; the state object is
+        # shared, so update it rather than the context variable
+        state = _state.get()
+        if state is not None:
+            state.use_replica = reads_from_replica(request, view_func)
+
+    def pin_after_write(self, request, state):
+        key = _pin_key(request)
+        if state.wrote and key and replica_alias():
+            cache.set(key, True, getattr(settings, 'REPLICA_PIN_SECONDS', 5))
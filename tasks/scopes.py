@@ -0,0 +1,173 @@
+"""
+Role scoping for every task, project and snapshot endpoint.
+
+A user's scope is the set of projects they work in: every project for a
+supermanager, the projects they manage for a manager, and the projects
+they have tasks in for an employee. accessible_project_ids() computes that
+set once and caches it under a per-user version; invalidate_access_scope()
+starts a new version whenever Project.assigned_to or a task's assignee or
+project changes, so stale sets are never read again and simply expire.
+Querysets filter on the cached ids and object-level checks are a set
+lookup, so authorization costs no query once the set is cached.
+
+The versions are what revoke access, so they must live in a cache every
+worker shares; settings refuse the per-process local-memory cache when
+more than one worker runs (see CACHES).
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework.permissions import SAFE_METHODS, BasePermission
+
+from .models import Project, Task, TaskSnapshot
+
+ACCESS_SCOPE_TIMEOUT = getattr(settings, 'ACCESS_SCOPE_TIMEOUT', 3600)
+
+
+def _version_key(user_id):
+    return f'access-scope-version:{user_id}'
+
+
+def _scope_key(user, version):
+    return f'access-scope:{user.id}:{user.role}:{version}'
+
+
+def _member_project_ids(user):
+    # Always read from the primary: a set computed from a lagging replica
+    # would be cached under the version that was meant to replace it
+    if user.role == 'manager':
+        projects = Project.objects.using(DEFAULT_DB_ALIAS).filter(assigned_to_id=user.id)
+        return projects.order_by().values_list('id', flat=True)
+    if user.role == 'employee':
+        tasks = Task.objects.using(DEFAULT_DB_ALIAS).filter(assigned_to_id=user.id)
+        return tasks.order_by().values_list('project_id', flat=True).distinct()
+    return Project.objects.none().values_list('id', flat=True)
+
+
+def accessible_project_ids(user):
+    """Ids of the projects ``user`` may access, or None for a supermanager (all of them)."""
+    if user.role == 'supermanager':
+        return None
+    version = cache.get(_version_key(user.id))
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(_version_key(user.id), version, None):
+            version = cache.get(_version_key(user.id), version)
+    key = _scope_key(user, version)
+    project_ids = cache.get(key)
+    if project_ids is None:
+        project_ids = frozenset(_member_project_ids(user))
+        cache.set(key, project_ids, ACCESS_SCOPE_TIMEOUT)
+    return project_ids
+
+
+async def aaccessible_project_ids(user):
+    if user.role == 'supermanager':
+        return None
+    version = await cache.aget(_version_key(user.id))
+    if version is None:
+        version = time.time_ns()
+        if not await cache.aadd(_version_key(user.id), version, None):
+            version = await cache.aget(_version_key(user.id), version)
+    key = _scope_key(user, version)
+    project_ids = await cache.aget(key)
+    if project_ids is None:
+        project_ids = frozenset([pk async for pk in _member_project_ids(user)])
+        await cache.aset(key, project_ids, ACCESS_SCOPE_TIMEOUT)
+    return project_ids
+
+
+def invalidate_access_scope(user_ids):
+    """
+    Start a new scope version for ``user_ids``. The version moves once now,
+    so the writing request already sees the change, and again on commit, so
+    a set another request cached from the pre-commit rows is not kept.
+    """
+    user_ids = {pk for pk in user_ids if pk}
+    if not user_ids:
+        return
+
+    def bump():
+        version = time.time_ns()
+        cache.set_many({_version_key(pk): version for pk in user_ids}, None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def can_access_project(user, project_id):
+    project_ids = accessible_project_ids(user)
+    if project_ids is None:
+        return True
+    try:
+        return int(project_id) in project_ids
+    except (TypeError, ValueError):
+        return False
+
+
+class WriteRolePermission(BasePermission):
+    """
+    Reserves unsafe methods for the view's ``write_role``. Scope only says
+    which projects a user may see: an employee's grows with every task they
+    file, so it must never be what lets them change or delete a project.
+    """
+    message = {'error': 'Unauthorized'}
+
+    def has_permission(self, request, view):
+        return request.method in SAFE_METHODS or request.user.role == view.write_role
+
+
+class ProjectScopePermission(BasePermission):
+    """Object-level check that a project, task or snapshot belongs to a project in the user's scope."""
+    message = {'error': 'Unauthorized'}
+
+    def has_object_permission(self, request, view, obj):
+        project_id = obj.pk if isinstance(obj, Project) else obj.project_id
+        return can_access_project(request.user, project_id)
+
+
+def scoped_task_queryset(user, role, project_id=None):
+    """
+    Tasks ``user`` may see through an endpoint reserved for ``role``.
+
+    The related users and project that TaskSerializer reads are joined in,
+    and the manager's cached project ids are part of the same WHERE clause,
+    so a listing is always a single query.
+    """
+    if user.role != role or role not in ('supermanager', 'manager', 'employee'):
+        return Task.objects.none()
+    # An employee's own tasks are in their scope by definition
+    if project_id and role == 'manager' and not can_access_project(user, project_id):
+        return Task.objects.none()
+
+    queryset = Task.objects.select_related('assigned_to', 'assigned_by', 'project')
+    if role == 'manager':
+        queryset = queryset.filter(project_id__in=sorted(accessible_project_ids(user)))
+    elif role == 'employee':
+        queryset = queryset.filter(assigned_to_id=user.id)
+
+    if project_id:
+        queryset = queryset.filter(project_id=project_id)
+    return queryset.order_by('-created_at')
+
+
+def scoped_snapshot_queryset(user):
+    """Trend snapshots ``user`` may see: everything, their projects, or their own tasks."""
+    if user.role == 'supermanager':
+        return TaskSnapshot.objects.all()
+    if user.role == 'manager':
+        return TaskSnapshot.objects.filter(project_id__in=sorted(accessible_project_ids(user)))
+    if user.role == 'employee':
+        return TaskSnapshot.objects.filter(assigned_to_id=user.id)
+    return TaskSnapshot.objects.none()
+
+
+def scoped_project_queryset(user):
+    """Projects ``user`` may see: everything, the ones they manage, or the ones they have tasks in."""
+    if user.role == 'supermanager':
+        return Project.objects.all()
+    if user.role in ('manager', 'employee'):
+        return Project.objects.filter(id__in=sorted(accessible_project_ids(user)))
+    return Project.objects.none()
@@ -0,0 +1,166 @@
+"""
+Full-text search over task titles/descriptions and project names/descriptions.
+
+On SQLite the text lives in FTS5 tables (task_search, project_search) whose
+rowid is the Task/Project id; the signals and bulk endpoints keep them in
+sync. On PostgreSQL a GIN index over the same to_tsvector() expression used
+in the query does the work and needs no upkeep. Other engines fall back to
+unranked icontains filtering.
+
+Ranking happens in SQL and the caller's (role-scoped) queryset is applied in
+the same statement, so results never leave the database unfiltered.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q, Value
+
+from .models import Project, Task
+
+SEARCH_FIELDS = {
+    Task: ('title', 'description'),
+    Project: ('name', 'description'),
+}
+FTS_TABLES = {
+    Task: 'task_search',
+    Project: 'project_search',
+}
+
+_words = re.compile(r'\w+', re.UNICODE)
+
+
+def fts5_query(text):
+    """
+    Turn free text into an FTS5 expression: every word must match, the last
+    one as a prefix so results show up while typing. FTS5 operators and
+    quotes in the input are dropped rather than interpreted.
+    """
+    words = _words.findall(text)
+    if not words:
+        return ''
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+class SearchBackend:
+    def search(self, queryset, text):
+        raise NotImplementedError
+
+    def index(self, model, instances):
+        """(Re)index ``instances`` of ``model``; a no-op where the database keeps the index."""
+
+    def unindex(self, model, ids):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class FTS5Search(SearchBackend):
+    def search(self, queryset, text):
+        model = queryset.model
+        match = fts5_query(text)
+        if not match:
+            return queryset.none()
+        table = FTS_TABLES[model]
+        # Joined rather than filtered through subqueries so SQLite drives the
+        # statement from the FTS index and scores each match once. The
+        # built-in rank column is bm25(), which is lower for better matches.
+        return queryset.extra(
+            tables=[table],
+            where=[f'{table}.rowid = "{model._meta.db_table}"."id"', f'{table} MATCH %s'],
+            params=[match],
+            select={'rank': f'-{table}.rank'},
+        ).order_by('-rank', '-id')
+
+    def index(self, model, instances):
+        table = FTS_TABLES[model]
+        fields = SEARCH_FIELDS[model]
+        rows = [
+            (instance.pk, *(getattr(instance, field) or '' for field in fields))
+            for instance in instances
+        ]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {table} WHERE rowid = %s', [(row[0],) for row in rows])
+            cursor.executemany(
+                f'INSERT INTO {table} (rowid, {", ".join(fields)}) VALUES (%s{", %s" * len(fields)})', rows
+            )
+
+    def unindex(self, model, ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLES[model]} WHERE rowid = %s', [(pk,) for pk in ids])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            for model, table in FTS_TABLES.items():
+                fields = SEARCH_FIELDS[model]
+                selected = ', '.join(f"COALESCE({field}, '')" for field in fields)
+                cursor.execute(f'DELETE FROM {table}')
+                cursor.execute(
+                    f'INSERT INTO {table} (rowid, {", ".join(fields)}) '
+                    f'SELECT id, {selected} FROM {model._meta.db_table}'
+                )
+
+
+class PostgresSearch(SearchBackend):
+    config = 'english'
+
+    def vector(self, model):
+        from django.contrib.postgres.search import SearchVector
+
+        return SearchVector(*SEARCH_FIELDS[model], config=self.config)
+
+    def search(self, queryset, text):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        if not text.strip():
+            return queryset.none()
+        query = SearchQuery(text, config=self.config, search_type='websearch')
+        vector = self.vector(queryset.model)
+        return (
+            queryset.annotate(search=vector)
+            .filter(search=query)  # the exact expression of the GIN index
+            .annotate(rank=SearchRank(vector, query))
+            .order_by('-rank', '-id')
+        )
+
+
+class FallbackSearch(SearchBackend):
+    def search(self, queryset, text):
+        words = _words.findall(text)
+        if not words:
+            return queryset.none()
+        fields = SEARCH_FIELDS[queryset.model]
+        condition = Q()
+        for word in words:
+            condition &= Q(*[(f'{field}__icontains', word) for field in fields], _connector=Q.OR)
+        return queryset.filter(condition).annotate(rank=Value(0.0)).order_by('-id')
+
+
+def search_backend():
+    if connection.vendor == 'sqlite':
+        return FTS5Search()
+    if connection.vendor == 'postgresql':
+        return PostgresSearch()
+    return FallbackSearch()
+
+
+def search(queryset, text):
+    """``queryset`` narrowed to rows matching ``text``, best match first."""
+    return search_backend().search(queryset, text)
+
+
+def index_instances(model, instances):
+    search_backend().index(model, instances)
+
+
+def unindex_instances(model, ids):
+    search_backend().unindex(model, ids)
+
+
+def rebuild_index():
+    """Repopulate the search tables from scratch (e.g. after loaddata or raw SQL writes)."""
+    search_backend().rebuild()
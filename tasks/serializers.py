@@ -3,6 +3,7 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.hashers import make_password
 from rest_framework.fields import DateField, DateTimeField
+from django.utils import timezone
 from .models import CustomUser, Project, Task, Activity  
 
 # class UserSerializer(serializers.ModelSerializer):
@@ -148,7 +149,8 @@ class TaskSerializer(serializers.ModelSerializer):
     assigned_by_details = serializers.SerializerMethodField()
     project_name = serializers.CharField(source='project.name', read_only=True)  
     def create(self, validated_data):
-        validated_data['assigned_by'] = self.context['request'].user
+        validated_data.pop('assigned_by', None)
+        validated_data.setdefault('assigned_by_id', self.context['request'].user.id)
         return super().create(validated_data)
 
     def validate(self, data):
@@ -187,6 +189,66 @@ class TaskSerializer(serializers.ModelSerializer):
                 'full_name': obj.assigned_by.full_name
             }
         return None
+# Flat row set for read-only task listings; see serialize_task_rows()
+TASK_ROW_FIELDS = (
+    'id', 'title', 'description', 'status', 'created_at', 'due_date', 'updated_at',
+    'project_id', 'project__name',
+    'assigned_to_id', 'assigned_to__username', 'assigned_to__full_name', 'assigned_to__email',
+    'assigned_by_id', 'assigned_by__username', 'assigned_by__full_name', 'assigned_by__role',
+)
+
+_task_created_at = DateTimeField(format="%Y-%m-%d %H:%M:%S")
+_task_updated_at = DateTimeField()
+_task_due_date = DateField(format="%Y-%m-%d")
+_task_status_display = dict(Task.STATUS_CHOICES)
+
+
+def task_row_to_representation(row, today):
+    """Map one ``Task.objects.values(*TASK_ROW_FIELDS)`` row to TaskSerializer's output."""
+    due_date = row['due_date']
+    status = row['status']
+    is_overdue = bool(due_date and status != 'completed' and due_date < today)
+    return {
+        'id': row['id'],
+        'assigned_to': row['assigned_to_id'],
+        'assigned_by': f"{row['assigned_by__full_name']} ({row['assigned_by__role']})",
+        'created_at': _task_created_at.to_representation(row['created_at']),
+        'due_date': _task_due_date.to_representation(due_date) if due_date is not None else None,
+        'is_overdue': is_overdue,
+        'display_status': "Overdue" if is_overdue else _task_status_display.get(status, status),
+        'assigned_to_details': {
+            'id': row['assigned_to_id'],
+            'username': row['assigned_to__username'],
+            'full_name': row['assigned_to__full_name'],
+            'email': row['assigned_to__email']
+        },
+        'assigned_by_details': {
+            'id': row['assigned_by_id'],
+            'username': row['assigned_by__username'],
+            'full_name': row['assigned_by__full_name']
+        },
+        'project_name': row['project__name'],
+        'title': row['title'],
+        'description': row['description'],
+        'status': status,
+        'updated_at': _task_updated_at.to_representation(row['updated_at']),
+        'project': row['project_id'],
+    }
+
+
+def serialize_task_rows(rows):
+    """
+    Read-only fast path for TaskSerializer(many=True).data.
+
+    ``rows`` come from ``Task.objects.values(*TASK_ROW_FIELDS)``, so related
+    users and the project name arrive in the same query, and each row is
+    mapped straight to TaskSerializer's output (same keys, order and
+    formatting) without going through the DRF field machinery per row.
+    """
+    today = timezone.now().date()
+    return [task_row_to_representation(row, today) for row in rows]
+
+
 class RecentActivitySerializer(serializers.Serializer):
     id = serializers.IntegerField()
     type = serializers.CharField()
@@ -208,23 +270,27 @@ class ActivitySerializer(serializers.ModelSerializer):
 
 
 
-class ManagerProjectSerializer(serializers.ModelSerializer):
+class ManagerProjectSerializer(ProjectSerializer):
     progress = serializers.SerializerMethodField()
     total_tasks = serializers.SerializerMethodField()
     completed_tasks = serializers.SerializerMethodField()
 
-    class Meta:
-        model = Project
-        fields = ['id', 'name', 'description', 'deadline', 'progress', 'total_tasks', 'completed_tasks']
+    class Meta(ProjectSerializer.Meta):
+        fields = ProjectSerializer.Meta.fields + ['progress', 'total_tasks', 'completed_tasks']
 
+    # Querysets built with reports.annotate_project_progress() carry the
+    # counts already; only fall back to per-row queries when they don't.
     def get_progress(self, obj):
-        tasks = obj.tasks.all()
-        total = tasks.count()
-        completed = tasks.filter(status='completed').count()
+        total = self.get_total_tasks(obj)
+        completed = self.get_completed_tasks(obj)
         return round((completed / total) * 100) if total > 0 else 0
 
     def get_total_tasks(self, obj):
+        if hasattr(obj, 'total_tasks'):
+            return obj.total_tasks
         return obj.tasks.count()
 
     def get_completed_tasks(self, obj):
-        return obj.tasks.filter(status='completed').count()
\ No newline at end of file
+        if hasattr(obj, 'completed_tasks'):
+            return obj.completed_tasks
+        return obj.tasks.filter(status='completed').count()
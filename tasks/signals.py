@@ -0,0 +1,211 @@
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .activity import record_activity
+from .authentication import TOKEN_USER_CLAIMS, revoke_user_tokens
+from .dashboard import invalidate_dashboard_stats
+from .events import project_event_data, publish_on_commit, task_event_data
+from .models import CustomUser, Project, ProjectStats, Task
+from .rollups import apply_task_change
+from .scopes import invalidate_access_scope
+from .search import index_instances, unindex_instances
+
+
+def _project_manager_ids(*project_ids):
+    project_ids = {pk for pk in project_ids if pk}
+    if not project_ids:
+        return []
+    return list(
+        Project.objects.filter(id__in=project_ids).values_list('assigned_to_id', flat=True)
+    )
+
+
+def _task_manager_ids(task, previous_project_id=None):
+    # A task loaded with its project already knows the manager
+    if previous_project_id in (None, task.project_id) and Task.project.is_cached(task):
+        project = task.project
+        if project is not None and project.pk == task.project_id:
+            return [project.assigned_to_id]
+    return _project_manager_ids(task.project_id, previous_project_id)
+
+
+# {project id: CascadedTasks} for projects whose delete is in progress
+_deleting_projects = ContextVar('deleting_projects', default=None)
+
+
+class CascadedTasks:
+    """Tasks removed along with a project, handled in one go once the project is gone."""
+
+    def __init__(self, manager_id=None):
+        self.manager_id = manager_id
+        self.task_ids = []
+        self.assignee_ids = set()
+
+
+def _invalidate_on_commit(manager_ids=(), supermanager=True):
+    manager_ids = list(manager_ids)
+    transaction.on_commit(lambda: invalidate_dashboard_stats(manager_ids, supermanager))
+
+
+@receiver(pre_save, sender=Task)
+def remember_previous_task(sender, instance, raw=False, **kwargs):
+    # Keep the values a save is about to overwrite so receivers can
+    # update whatever the old row contributed to.
+    instance._previous_state = None
+    if instance.pk and not raw:
+        instance._previous_state = (
+            Task.objects.filter(pk=instance.pk)
+            .values('project_id', 'status', 'assigned_to_id')
+            .first()
+        )
+
+
+@receiver(pre_save, sender=Project)
+def remember_previous_project(sender, instance, raw=False, **kwargs):
+    instance._previous_state = None
+    if instance.pk and not raw:
+        instance._previous_state = (
+            Project.objects.filter(pk=instance.pk).values('assigned_to_id').first()
+        )
+
+
+@receiver(pre_save, sender=CustomUser)
+def remember_previous_user(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_state = None
+    # Logins only touch last_login, and transparent rehashing on login rewrites
+    # the password hash for the same secret; neither should revoke tokens.
+    # Any other save(update_fields=['password']) is a password change.
+    if update_fields is not None and (
+        update_fields == {'last_login'}
+        or (update_fields == {'password'} and instance._password_rehashed)
+    ):
+        return
+    if instance.pk and not raw:
+        instance._previous_state = (
+            CustomUser.objects.filter(pk=instance.pk).values(*TOKEN_USER_CLAIMS, 'password').first()
+        )
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_state', None) or {}
+    apply_task_change(
+        old=(previous['project_id'], previous['status']) if previous else None,
+        new=(instance.project_id, instance.status),
+    )
+    index_instances(Task, [instance])
+    # The assignee's project scope only changes when a task enters or leaves one of their projects
+    if not previous or (previous['project_id'], previous['assigned_to_id']) != (
+        instance.project_id, instance.assigned_to_id
+    ):
+        invalidate_access_scope([instance.assigned_to_id, previous.get('assigned_to_id')])
+    manager_ids = _task_manager_ids(instance, previous.get('project_id'))
+    _invalidate_on_commit(manager_ids)
+    publish_on_commit(
+        'task.created' if created else 'task.updated', task_event_data(instance),
+        managers=manager_ids, employees=[instance.assigned_to_id, previous.get('assigned_to_id')]
+    )
+
+    details = {'title': instance.title, 'project_id': instance.project_id, 'status': instance.status}
+    if created:
+        record_activity('create', instance, **details)
+    elif previous and previous['status'] != instance.status:
+        record_activity('status_change', instance, from_status=previous['status'], **details)
+    else:
+        record_activity('update', instance, **details)
+
+
+@receiver(pre_delete, sender=Project)
+def remember_deleting_project(sender, instance, **kwargs):
+    # Sent before any of the cascaded task deletes
+    deleting = _deleting_projects.get()
+    if deleting is None:
+        deleting = {}
+        _deleting_projects.set(deleting)
+    deleting[instance.pk] = CascadedTasks(instance.assigned_to_id)
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    cascade = (_deleting_projects.get() or {}).get(instance.project_id)
+    if cascade is not None:
+        # The rollup row goes with the project; project_deleted does the rest
+        cascade.task_ids.append(instance.pk)
+        cascade.assignee_ids.add(instance.assigned_to_id)
+        manager_ids = [cascade.manager_id]
+    else:
+        apply_task_change(old=(instance.project_id, instance.status))
+        unindex_instances(Task, [instance.pk])
+        invalidate_access_scope([instance.assigned_to_id])
+        manager_ids = _task_manager_ids(instance)
+        _invalidate_on_commit(manager_ids)
+    publish_on_commit(
+        'task.deleted', task_event_data(instance), managers=manager_ids, employees=[instance.assigned_to_id]
+    )
+    record_activity('delete', instance, title=instance.title, project_id=instance.project_id)
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        ProjectStats.objects.get_or_create(project=instance)
+    index_instances(Project, [instance])
+    previous = getattr(instance, '_previous_state', None) or {}
+    if created or previous.get('assigned_to_id') != instance.assigned_to_id:
+        invalidate_access_scope([instance.assigned_to_id, previous.get('assigned_to_id')])
+    _invalidate_on_commit([instance.assigned_to_id, previous.get('assigned_to_id')])
+    publish_on_commit(
+        'project.created' if created else 'project.updated', project_event_data(instance),
+        managers=[instance.assigned_to_id, previous.get('assigned_to_id')]
+    )
+    record_activity(
+        'create' if created else 'update', instance,
+        name=instance.name, assigned_to_id=instance.assigned_to_id
+    )
+
+
+@receiver(post_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    cascade = (_deleting_projects.get() or {}).pop(instance.pk, None) or CascadedTasks()
+    invalidate_access_scope([instance.assigned_to_id, *cascade.assignee_ids])
+    _invalidate_on_commit([instance.assigned_to_id])
+    if cascade.task_ids:
+        unindex_instances(Task, cascade.task_ids)
+    unindex_instances(Project, [instance.pk])
+    publish_on_commit('project.deleted', project_event_data(instance), managers=[instance.assigned_to_id])
+    record_activity('delete', instance, name=instance.name)
+
+
+@receiver(post_save, sender=CustomUser)
+def user_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    # Only the user total depends on users; logins and profile edits don't move it
+    if created:
+        _invalidate_on_commit()
+
+    # Access tokens carry these values as claims; changing them revokes the tokens
+    previous = getattr(instance, '_previous_state', None)
+    if previous and any(
+        previous[field] != getattr(instance, field) for field in TOKEN_USER_CLAIMS + ('password',)
+    ):
+        revoke_user_tokens(instance.pk)
+
+    record_activity(
+        'create' if created else 'update', instance,
+        username=instance.username, role=instance.role
+    )
+
+
+@receiver(post_delete, sender=CustomUser)
+def user_deleted(sender, instance, **kwargs):
+    _invalidate_on_commit()
+    revoke_user_tokens(instance.pk)
+    record_activity('delete', instance, username=instance.username, role=instance.role)
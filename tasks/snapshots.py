@@ -0,0 +1,81 @@
+"""
+Daily TaskSnapshot rows (manage.py snapshot_tasks). Each run records
+today: counts are taken from the current Task rows, so they only describe
+the day they are taken on, and a missed day stays a gap. Only projects with task writes since the previous
+snapshot are recounted from Task; every other (project, assignee) group is
+carried over from that snapshot. Overdue counts move with the date alone, so
+they are recounted for all groups through the partial index on open tasks.
+"""
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .models import ProjectStats, Task, TaskSnapshot
+from .rollups import COUNTER_FIELDS, STATUS_COUNTERS
+
+SNAPSHOT_FIELDS = COUNTER_FIELDS + ('overdue_tasks',)
+
+
+def _group_counts(tasks):
+    counts = dict(total_tasks=Count('id'))
+    counts.update((field, Count('id', filter=Q(status=status))) for status, field in STATUS_COUNTERS.items())
+    rows = tasks.values('project_id', 'assigned_to_id').annotate(**counts).order_by()
+    return {(row.pop('project_id'), row.pop('assigned_to_id')): row for row in rows}
+
+
+def _overdue_counts(day):
+    open_tasks = Task.objects.filter(due_date__lt=day).exclude(status='completed')
+    rows = open_tasks.values('project_id', 'assigned_to_id').annotate(overdue=Count('id')).order_by()
+    return {(row['project_id'], row['assigned_to_id']): row['overdue'] for row in rows}
+
+
+def changed_project_ids(since):
+    changed = set(Task.objects.filter(updated_at__gt=since).values_list('project_id', flat=True))
+    # Deleted tasks leave no newer row behind, but they do touch the rollup
+    changed.update(ProjectStats.objects.filter(updated_at__gt=since).values_list('project_id', flat=True))
+    return changed
+
+
+def take_snapshot(day=None, full=False):
+    """
+    Write today's snapshot, replacing any earlier run today. ``day`` may
+    only name today: any other day would be overwritten with today's counts.
+    Returns (groups written, projects recounted), the latter None when
+    everything was recounted.
+    """
+    today = timezone.now().date()
+    if day is not None and day != today:
+        raise ValueError(f"Snapshots can only be recorded for today ({today}), not {day}")
+    day = today
+    recorded_at = timezone.now()
+    previous = None if full else (
+        TaskSnapshot.objects.filter(date__lt=day).aggregate(date=Max('date'))['date']
+    )
+
+    if previous is None:
+        changed = None
+        counts = _group_counts(Task.objects.all())
+    else:
+        previous_rows = TaskSnapshot.objects.filter(date=previous)
+        changed = changed_project_ids(previous_rows.aggregate(at=Max('recorded_at'))['at'])
+        counts = {
+            (row.pop('project_id'), row.pop('assigned_to_id')): row
+            for row in previous_rows.exclude(project_id__in=changed)
+            .values('project_id', 'assigned_to_id', *COUNTER_FIELDS)
+        }
+        counts.update(_group_counts(Task.objects.filter(project_id__in=changed)))
+
+    overdue = _overdue_counts(day)
+    snapshots = [
+        TaskSnapshot(
+            date=day, project_id=project_id, assigned_to_id=assigned_to_id,
+            overdue_tasks=overdue.get((project_id, assigned_to_id), 0),
+            recorded_at=recorded_at, **row
+        )
+        for (project_id, assigned_to_id), row in counts.items()
+        if row['total_tasks']
+    ]
+    with transaction.atomic():
+        TaskSnapshot.objects.filter(date=day).delete()
+        TaskSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+    return len(snapshots), None if changed is None else len(changed)
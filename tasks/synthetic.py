@@ -0,0 +1,170 @@
+"""
+Deterministic synthetic organisations for development and benchmarks
+(manage.py generate_org, benchmarks/api.py).
+
+The same seed and reference day always produce the same users, projects,
+tasks and activity rows; only the auto_now timestamps follow the clock.
+Rows are written with bulk_create, which skips the model signals, so the
+ProjectStats rollup, the search index and today's trend snapshot are
+rebuilt at the end.
+"""
+import random
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Activity, CustomUser, Project, Task
+from .rollups import rebuild_project_stats
+from .search import rebuild_index
+from .snapshots import take_snapshot
+
+BATCH_SIZE = 5000
+
+FIRST_NAMES = (
+    'Ada', 'Ben', 'Chloe', 'Dev', 'Elena', 'Farid', 'Grace', 'Hiro', 'Ines', 'Jonas',
+    'Kemi', 'Liam', 'Maya', 'Nikolai', 'Olivia', 'Priya', 'Quinn', 'Rosa', 'Sam', 'Tariq',
+)
+LAST_NAMES = (
+    'Okafor', 'Lindqvist', 'Moreau', 'Patel', 'Nakamura', 'Garcia', 'Kowalski', 'Haddad',
+    'Schmidt', 'Silva', 'Chen', 'Murphy', 'Novak', 'Ibrahim', 'Rossi', 'Walker',
+)
+PROJECT_AREAS = (
+    'Billing', 'Onboarding', 'Mobile App', 'Data Platform', 'Support Portal', 'Checkout',
+    'Search', 'Reporting', 'Identity', 'Notifications', 'Warehouse', 'Marketing Site',
+)
+PROJECT_KINDS = ('Revamp', 'Migration', 'Launch', 'Audit', 'Integration', 'Cleanup')
+TASK_VERBS = (
+    'Design', 'Implement', 'Review', 'Test', 'Document', 'Refactor', 'Deploy', 'Investigate',
+    'Fix', 'Benchmark', 'Estimate', 'Prototype',
+)
+TASK_OBJECTS = (
+    'login flow', 'invoice export', 'search filters', 'payment retries', 'email templates',
+    'audit log', 'API pagination', 'dashboard charts', 'role permissions', 'CSV import',
+    'error alerts', 'cache layer', 'release notes', 'accessibility issues', 'database indexes',
+)
+# Older tasks are more likely to be done
+STATUS_WEIGHTS = {
+    'recent': {'pending': 5, 'in_progress': 3, 'completed': 2},
+    'old': {'pending': 1, 'in_progress': 2, 'completed': 7},
+}
+
+
+def _aware(day, rng):
+    moment = datetime.combine(day, time(hour=rng.randint(8, 18), minute=rng.randint(0, 59)))
+    return timezone.make_aware(moment)
+
+
+def _person(rng):
+    return f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+
+
+def _bulk_create(model, rows):
+    return model.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+def generate_org(supermanagers=2, managers=10, employees=100, projects=50, tasks=5000,
+                 seed=0, prefix='org', password=None, today=None):
+    """
+    Create one organisation; returns the number of rows written per model.
+    Usernames and emails start with ``prefix`` so several organisations
+    can share a database.
+    """
+    rng = random.Random(seed)
+    today = today or timezone.localdate()
+    # Hash once: every generated user gets the same (possibly unusable) password
+    password_hash = make_password(password)
+
+    def users(role, count, max_age):
+        return (
+            CustomUser(
+                username=f'{prefix}-{role}-{i}',
+                email=f'{prefix}-{role}-{i}@example.com',
+                full_name=_person(rng),
+                role=role,
+                password=password_hash,
+                date_joined=_aware(today - timedelta(days=rng.randint(0, max_age)), rng),
+            )
+            for i in range(count)
+        )
+
+    with transaction.atomic():
+        bosses = _bulk_create(CustomUser, users('supermanager', supermanagers, 1000))
+        leads = _bulk_create(CustomUser, users('manager', managers, 700))
+        staff = _bulk_create(CustomUser, users('employee', employees, 500))
+
+        # A few managers run most projects, as in real organisations
+        lead_weights = [1 / (rank + 1) for rank in range(len(leads))]
+        project_rows = []
+        for i in range(projects):
+            created = today - timedelta(days=rng.randint(14, 540))
+            project_rows.append(Project(
+                name=f'{rng.choice(PROJECT_AREAS)} {rng.choice(PROJECT_KINDS)} {i + 1}',
+                description=f'{rng.choice(PROJECT_KINDS)} of the {rng.choice(PROJECT_AREAS).lower()} area.',
+                created_by=rng.choice(bosses),
+                assigned_to=rng.choices(leads, lead_weights)[0],
+                created_at=_aware(created, rng),
+                deadline=created + timedelta(days=rng.randint(30, 365)) if rng.random() < 0.8 else None,
+            ))
+        saved_projects = _bulk_create(Project, project_rows)
+
+        # Each project draws its assignees from its own team
+        teams = {
+            project.pk: rng.sample(staff, min(len(staff), rng.randint(3, 12)))
+            for project in saved_projects
+        }
+
+        task_count = activity_count = 0
+        # Tasks are generated and inserted a batch at a time so large
+        # organisations never sit in memory at once
+        while task_count < tasks:
+            batch = []
+            for _ in range(min(BATCH_SIZE, tasks - task_count)):
+                project = rng.choice(saved_projects)
+                age = rng.randint(0, (today - project.created_at.date()).days)
+                created = today - timedelta(days=age)
+                weights = STATUS_WEIGHTS['old' if age > 30 else 'recent']
+                batch.append(Task(
+                    title=f'{rng.choice(TASK_VERBS)} {rng.choice(TASK_OBJECTS)}',
+                    description=f'{rng.choice(TASK_VERBS)} the {rng.choice(TASK_OBJECTS)} for {project.name}.',
+                    project=project,
+                    assigned_by_id=project.assigned_to_id,
+                    assigned_to=rng.choice(teams[project.pk]),
+                    status=rng.choices(list(weights), list(weights.values()))[0],
+                    created_at=_aware(created, rng),
+                    due_date=created + timedelta(days=rng.randint(1, 45)) if rng.random() < 0.85 else None,
+                ))
+            task_count += len(Task.objects.bulk_create(batch))
+            activity_count += len(Activity.objects.bulk_create(_task_activity(batch, rng)))
+
+    rebuild_project_stats()
+    rebuild_index()
+    take_snapshot(full=True)
+    return {
+        'users': len(bosses) + len(leads) + len(staff),
+        'projects': len(saved_projects),
+        'tasks': task_count,
+        'activities': activity_count,
+    }
+
+
+def _task_activity(tasks, rng):
+    """Creation and status-change entries for a share of ``tasks``."""
+    rows = []
+    for task in tasks:
+        created = rng.random() < 0.2
+        changed = task.status != 'pending' and rng.random() < 0.2
+        # Same details as signals.task_saved records for these actions
+        details = {'title': task.title, 'project_id': task.project_id}
+        if created:
+            rows.append(Activity(
+                user_id=task.assigned_by_id, action='create', content_type='task',
+                object_id=task.pk, details={**details, 'status': 'pending' if changed else task.status},
+            ))
+        if changed:
+            rows.append(Activity(
+                user_id=task.assigned_to_id, action='status_change', content_type='task',
+                object_id=task.pk, details={'from_status': 'pending', **details, 'status': task.status},
+            ))
+    return rows
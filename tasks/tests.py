@@ -1,3 +1,1372 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from asgiref.sync import sync_to_async
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import tokens_for_user
+from .events import get_broker, visible_to
+from .instrumentation import registry as request_metrics
+from .login import LOGIN_MAX_FAILURES
+from .models import Activity, CustomUser, Project, ProjectStats, Task, TaskSnapshot
+from .routing import RoutingState, _state as routing_state
+from .rollups import COUNTER_FIELDS, verify_project_stats
+from .scopes import accessible_project_ids, invalidate_access_scope
+from .serializers import TASK_ROW_FIELDS, TaskSerializer, serialize_task_rows
+from .snapshots import take_snapshot
+
+
+class TaskflowTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.supermanager = CustomUser.objects.create_user(
+            'boss', 'boss@example.com', 'password123', full_name='Boss', role='supermanager'
+        )
+        cls.manager = CustomUser.objects.create_user(
+            'manager', 'manager@example.com', 'password123', full_name='Manager', role='manager'
+        )
+        cls.employee = CustomUser.objects.create_user(
+            'employee', 'employee@example.com', 'password123', full_name='Employee', role='employee'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login(self, user):
+        self.client.force_authenticate(user)
+
+    def make_project(self, name='Project', manager=None, **kwargs):
+        return Project.objects.create(
+            name=name,
+            description=f'{name} description',
+            created_by=self.supermanager,
+            assigned_to=manager or self.manager,
+            **kwargs
+        )
+
+    def make_task(self, project, status='pending', employee=None, **kwargs):
+        return Task.objects.create(
+            title=kwargs.pop('title', f'Task for {project.name}'),
+            project=project,
+            assigned_by=self.manager,
+            assigned_to=employee or self.employee,
+            status=status,
+            **kwargs
+        )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(ctx.captured_queries), response
+
+
+class ReportViewTests(TaskflowTestCase):
+    def test_report_shape_and_totals(self):
+        yesterday = timezone.now().date() - timedelta(days=1)
+        alpha = self.make_project('Alpha')
+        beta = self.make_project('Beta')
+        self.make_task(alpha, 'completed')
+        self.make_task(alpha, 'pending', due_date=yesterday)
+        self.make_task(alpha, 'in_progress')
+
+        self.login(self.supermanager)
+        response = self.client.get('/api/reports/')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+
+        self.assertEqual(data['stats'], {
+            'total_tasks': 3,
+            'completed_tasks': 1,
+            'pending_tasks': 1,
+            'in_progress_tasks': 1,
+            'overdue_tasks': 1,
+        })
+        self.assertEqual(data['statusDistribution']['data'], [1, 1, 1, 1])
+        progress = {p['id']: p for p in data['projectsProgress']}
+        self.assertAlmostEqual(progress[alpha.id]['progress'], 100 / 3)
+        self.assertEqual(progress[alpha.id]['total_tasks'], 3)
+        self.assertEqual(progress[beta.id]['progress'], 0)
+        self.assertEqual({p['id'] for p in data['allProjects']}, {alpha.id, beta.id})
+
+        response = self.client.get(f'/api/reports/?project={beta.id}')
+        data = response.json()
+        self.assertEqual(data['stats']['total_tasks'], 0)
+        self.assertEqual([p['id'] for p in data['projectsProgress']], [beta.id])
+        self.assertEqual(len(data['allProjects']), 2)
+
+    def test_query_count_does_not_grow_with_projects(self):
+        self.login(self.supermanager)
+        self.make_task(self.make_project('First'))
+        small, _ = self.count_queries('/api/reports/')
+
+        for i in range(20):
+            self.make_task(self.make_project(f'Project {i}'), 'completed')
+        large, response = self.count_queries('/api/reports/')
+
+        self.assertEqual(len(response.json()['projectsProgress']), 21)
+        self.assertEqual(small, large)
+
+
+class ManagerProjectListTests(TaskflowTestCase):
+    def test_progress_comes_from_annotations(self):
+        project = self.make_project('Alpha')
+        self.make_task(project, 'completed')
+        self.make_task(project, 'pending')
+        self.login(self.manager)
+
+        small, response = self.count_queries('/api/manager/projects/')
+        row = response.json()[0]
+        self.assertEqual((row['total_tasks'], row['completed_tasks'], row['progress']), (2, 1, 50))
+        self.assertEqual(row['assigned_to'], self.manager.id)
+
+        for i in range(10):
+            self.make_task(self.make_project(f'Project {i}'))
+        large, response = self.count_queries('/api/manager/projects/')
+        self.assertEqual(len(response.json()), 11)
+        self.assertEqual(small, large)
+
+
+class DashboardStatsCacheTests(TaskflowTestCase):
+    def test_supermanager_stats_are_cached_and_invalidated(self):
+        project = self.make_project('Alpha')
+        self.make_task(project, 'pending')
+        self.login(self.supermanager)
+
+        self.count_queries('/api/supermanager-dashboard-stats/')
+        queries, response = self.count_queries('/api/supermanager-dashboard-stats/')
+        self.assertEqual(queries, 0)
+        self.assertEqual(response.json()['pending_tasks'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_task(project, 'completed')
+        _, response = self.count_queries('/api/supermanager-dashboard-stats/')
+        self.assertEqual(response.json()['completed_tasks'], 1)
+        self.assertEqual(response.json()['total_users'], 3)
+
+    def test_manager_stats_follow_task_moves_and_dates(self):
+        other_manager = CustomUser.objects.create_user(
+            'other', 'other@example.com', 'password123', full_name='Other', role='manager'
+        )
+        mine = self.make_project('Mine')
+        theirs = self.make_project('Theirs', manager=other_manager)
+        tomorrow = timezone.now().date() + timedelta(days=1)
+        task = self.make_task(mine, 'pending', due_date=tomorrow)
+        self.login(self.manager)
+
+        _, response = self.count_queries('/api/manager-dashboard-stats/')
+        self.assertEqual(response.json()['pending_tasks'], 1)
+        self.assertEqual(response.json()['overdue_tasks'], 0)
+
+        later = timezone.now() + timedelta(days=2)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            _, response = self.count_queries('/api/manager-dashboard-stats/')
+        self.assertEqual(response.json()['overdue_tasks'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            task.project = theirs
+            task.save()
+        _, response = self.count_queries('/api/manager-dashboard-stats/')
+        self.assertEqual(response.json()['pending_tasks'], 0)
+
+
+class RecentActivityTests(TaskflowTestCase):
+    def test_merges_sources_newest_first_and_pages_back(self):
+        base = timezone.now() - timedelta(hours=5)
+        project = self.make_project('Alpha', created_at=base)
+        for hour in range(1, 5):
+            self.make_task(project, title=f'Task {hour}', created_at=base + timedelta(hours=hour))
+        self.login(self.supermanager)
+
+        response = self.client.get('/api/recent-activity/?limit=3')
+        self.assertEqual(response.status_code, 200)
+        items = response.json()
+        self.assertEqual(len(items), 3)
+        timestamps = [item['timestamp'] for item in items]
+        self.assertEqual(timestamps, sorted(timestamps, reverse=True))
+
+        response = self.client.get(
+            '/api/recent-activity/', {'limit': 50, 'before': (base + timedelta(hours=2, minutes=30)).isoformat()}
+        )
+        titles = [item['title'] for item in response.json()]
+        self.assertEqual(titles[:2], ['Task created: Task 2', 'Task created: Task 1'])
+        self.assertNotIn('Task created: Task 3', titles)
+
+    def test_query_count_does_not_depend_on_history(self):
+        project = self.make_project('Alpha')
+        self.login(self.supermanager)
+        self.make_task(project)
+        small, _ = self.count_queries('/api/recent-activity/?limit=5')
+        for i in range(30):
+            self.make_task(project, title=f'Task {i}')
+        large, response = self.count_queries('/api/recent-activity/?limit=5')
+        self.assertEqual(len(response.json()), 5)
+        self.assertEqual(small, large)
+
+    def test_rejects_bad_cursor(self):
+        self.login(self.supermanager)
+        response = self.client.get('/api/recent-activity/?before=yesterday')
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_bad_limit(self):
+        self.login(self.supermanager)
+        response = self.client.get('/api/recent-activity/?limit=ten')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'limit must be an integer'})
+
+
+class ActivityLogTests(TaskflowTestCase):
+    def test_viewset_writes_are_recorded(self):
+        project = self.make_project('Alpha')
+        task = self.make_task(project)
+        self.assertFalse(Activity.objects.exists())
+        self.login(self.manager)
+
+        response = self.client.patch(f'/api/manager/tasks/{task.id}/', {'status': 'completed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.patch(f'/api/manager/tasks/{task.id}/', {'title': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.delete(f'/api/manager/tasks/{task.id}/')
+        self.assertEqual(response.status_code, 204)
+
+        actions = list(Activity.objects.order_by('id').values_list('action', 'content_type', 'object_id'))
+        self.assertEqual(actions, [
+            ('status_change', 'task', task.id),
+            ('update', 'task', task.id),
+            ('delete', 'task', task.id),
+        ])
+        first = Activity.objects.order_by('id').first()
+        self.assertEqual(first.user, self.manager)
+        self.assertEqual(first.details['from_status'], 'pending')
+
+    def test_failed_writes_are_not_recorded(self):
+        self.login(self.supermanager)
+        response = self.client.post('/api/supermanager/users/', {'username': 'x'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Activity.objects.exists())
+
+    def test_feed_uses_keyset_pagination(self):
+        Activity.objects.bulk_create([
+            Activity(user=self.manager, action='update', content_type='task', object_id=i)
+            for i in range(5)
+        ])
+        self.login(self.supermanager)
+        response = self.client.get('/api/activity/?page_size=3')
+        page = response.json()
+        self.assertEqual([a['object_id'] for a in page['results']], [4, 3, 2])
+        response = self.client.get(page['next'])
+        self.assertEqual([a['object_id'] for a in response.json()['results']], [1, 0])
+
+        self.login(self.employee)
+        self.assertEqual(self.client.get('/api/activity/').json()['results'], [])
+
+
+class CursorPaginationTests(TaskflowTestCase):
+    def test_lists_are_unpaginated_without_a_cursor(self):
+        project = self.make_project('Alpha')
+        for i in range(3):
+            self.make_task(project, title=f'Task {i}')
+        self.login(self.supermanager)
+        response = self.client.get('/api/supermanager/tasks/')
+        self.assertIsInstance(response.json(), list)
+        self.assertEqual(len(response.json()), 3)
+
+    def test_page_size_opts_into_cursor_pages(self):
+        project = self.make_project('Alpha')
+        start = timezone.now() - timedelta(days=1)
+        for i in range(5):
+            self.make_task(project, title=f'Task {i}', created_at=start + timedelta(minutes=i))
+        self.login(self.supermanager)
+
+        page = self.client.get('/api/supermanager/tasks/?page_size=2').json()
+        titles = [t['title'] for t in page['results']]
+        while page['next']:
+            page = self.client.get(page['next']).json()
+            titles += [t['title'] for t in page['results']]
+        self.assertEqual(titles, [f'Task {i}' for i in reversed(range(5))])
+
+    def test_user_list_pages_and_keeps_dashboard_filter(self):
+        self.employee.is_active = False
+        self.employee.save()
+        self.login(self.supermanager)
+        page = self.client.get('/api/supermanager/users/?page_size=1&dashboard=true').json()
+        self.assertEqual(len(page['results']), 1)
+        second = self.client.get(page['next']).json()
+        self.assertIsNone(second['next'])
+        usernames = {page['results'][0]['username'], second['results'][0]['username']}
+        self.assertEqual(usernames, {'boss', 'manager'})
+        self.assertEqual(len(self.client.get('/api/supermanager/users/').json()), 3)
+
+
+class TaskQueryBudgetTests(TaskflowTestCase):
+    # One aggregate for the ETag validators and one for the list itself,
+    # regardless of how many tasks it returns, once the access scope is cached
+    endpoints = [
+        ('supermanager', '/api/supermanager/tasks/'),
+        ('manager', '/api/manager/tasks/'),
+        ('employee', '/api/employee/tasks/'),
+    ]
+
+    def test_task_lists_have_a_fixed_query_budget(self):
+        project = self.make_project('Alpha')
+        for i in range(10):
+            self.make_task(project, title=f'Task {i}')
+
+        for role, url in self.endpoints:
+            with self.subTest(role=role):
+                self.login(getattr(self, role))
+                accessible_project_ids(getattr(self, role))
+                with self.assertNumQueries(2):
+                    response = self.client.get(url)
+                self.assertEqual(len(response.json()), 10)
+                with self.assertNumQueries(2):
+                    self.client.get(f'{url}?project={project.id}')
+
+    def test_manager_cannot_read_other_projects(self):
+        other_manager = CustomUser.objects.create_user(
+            'other', 'other@example.com', 'password123', full_name='Other', role='manager'
+        )
+        theirs = self.make_project('Theirs', manager=other_manager)
+        self.make_task(theirs)
+        self.login(self.manager)
+        self.assertEqual(self.client.get(f'/api/manager/tasks/?project={theirs.id}').json(), [])
+        self.assertEqual(self.client.get('/api/manager/tasks/').json(), [])
+
+
+
+class AccessScopeTests(TaskflowTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_manager = CustomUser.objects.create_user(
+            'other', 'other@example.com', 'password123', full_name='Other', role='manager'
+        )
+        self.ours = self.make_project('Ours')
+        self.theirs = self.make_project('Theirs', manager=self.other_manager)
+
+    def test_scope_is_computed_once_and_cached(self):
+        self.assertEqual(accessible_project_ids(self.manager), {self.ours.id})
+        with self.assertNumQueries(0):
+            self.assertEqual(accessible_project_ids(self.manager), {self.ours.id})
+        self.assertIsNone(accessible_project_ids(self.supermanager))
+
+    def test_reassigning_a_project_moves_it_between_scopes(self):
+        self.make_task(self.ours)
+        self.assertEqual(accessible_project_ids(self.other_manager), {self.theirs.id})
+        self.assertEqual(accessible_project_ids(self.manager), {self.ours.id})
+
+        self.ours.assigned_to = self.other_manager
+        self.ours.save()
+        self.assertEqual(accessible_project_ids(self.manager), frozenset())
+        self.assertEqual(accessible_project_ids(self.other_manager), {self.ours.id, self.theirs.id})
+        self.login(self.manager)
+        self.assertEqual(self.client.get('/api/manager/tasks/').json(), [])
+        self.assertEqual(self.client.get(f'/api/manager/projects/{self.ours.id}/').status_code, 404)
+
+    def test_employee_scope_follows_their_tasks(self):
+        self.assertEqual(accessible_project_ids(self.employee), frozenset())
+        task = self.make_task(self.ours)
+        self.assertEqual(accessible_project_ids(self.employee), {self.ours.id})
+        task.project = self.theirs
+        task.save()
+        self.assertEqual(accessible_project_ids(self.employee), {self.theirs.id})
+        task.delete()
+        self.assertEqual(accessible_project_ids(self.employee), frozenset())
+
+    def test_invalidation_starts_a_new_version(self):
+        accessible_project_ids(self.manager)
+        # A project row written behind the signals' back is only seen after invalidation
+        Project.objects.filter(pk=self.theirs.pk).update(assigned_to=self.manager)
+        self.assertEqual(accessible_project_ids(self.manager), {self.ours.id})
+        invalidate_access_scope([self.manager.id])
+        self.assertEqual(accessible_project_ids(self.manager), {self.ours.id, self.theirs.id})
+
+    def test_reassignment_reaches_other_workers_through_a_shared_cache(self):
+        databases = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'test_cache'}}
+        with override_settings(CACHES=databases):
+            call_command('createcachetable', verbosity=0)
+            self.assertEqual(accessible_project_ids(self.manager), {self.ours.id})
+            # Another worker cached the same set before the reassignment
+            other_worker = caches.create_connection('default')
+            self.ours.assigned_to = self.other_manager
+            self.ours.save()
+            with mock.patch('tasks.scopes.cache', other_worker):
+                self.assertEqual(accessible_project_ids(self.manager), frozenset())
+
+    def test_tasks_cannot_be_written_into_projects_out_of_scope(self):
+        task = self.make_task(self.ours)
+        self.login(self.manager)
+        response = self.client.post('/api/manager/tasks/', {
+            'title': 'New', 'project': self.theirs.id, 'assigned_to': self.employee.id,
+        }, format='json')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.patch(f'/api/manager/tasks/{task.id}/', {'project': self.theirs.id}, format='json')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post('/api/manager/tasks/bulk/', [
+            {'title': 'New', 'project': self.theirs.id, 'assigned_to': self.employee.id},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Task.objects.filter(project=self.theirs).exists())
+
+    def test_employees_can_file_tasks_in_projects_outside_their_scope(self):
+        self.assertEqual(accessible_project_ids(self.employee), frozenset())
+        self.login(self.employee)
+        response = self.client.post('/api/employee/tasks/', {
+            'title': 'First', 'project': self.theirs.id, 'assigned_to': self.employee.id,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(accessible_project_ids(self.employee), {self.theirs.id})
+
+    def test_scope_does_not_grant_project_writes(self):
+        self.make_task(self.theirs)
+        self.assertEqual(accessible_project_ids(self.employee), {self.theirs.id})
+        self.login(self.employee)
+        url = f'/api/supermanager/projects/{self.theirs.id}/'
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.patch(url, {'name': 'Mine'}, format='json').status_code, 403)
+        self.assertEqual(self.client.delete(url).status_code, 403)
+        self.login(self.manager)
+        url = f'/api/supermanager/projects/{self.ours.id}/'
+        self.assertEqual(self.client.delete(url).status_code, 403)
+        self.assertEqual(self.client.delete(f'/api/manager/projects/{self.ours.id}/').status_code, 204)
+        self.theirs.refresh_from_db()
+        self.assertEqual(self.theirs.name, 'Theirs')
+
+    def test_project_endpoint_is_scoped(self):
+        self.login(self.manager)
+        names = [project['name'] for project in self.client.get('/api/supermanager/projects/').json()]
+        self.assertEqual(names, ['Ours'])
+        self.assertEqual(self.client.get(f'/api/supermanager/projects/{self.theirs.id}/').status_code, 404)
+        self.login(self.supermanager)
+        self.assertEqual(len(self.client.get('/api/supermanager/projects/').json()), 2)
+
+class TaskFilterTests(TaskflowTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_employee = CustomUser.objects.create_user(
+            'other', 'other@example.com', 'password123', full_name='Other', role='employee'
+        )
+        project = self.make_project('Alpha')
+        today = timezone.now().date()
+        start = timezone.now() - timedelta(days=1)
+        self.late = self.make_task(project, 'pending', title='Late', due_date=today - timedelta(days=2),
+                                   created_at=start)
+        self.done = self.make_task(project, 'completed', title='Done', due_date=today - timedelta(days=2),
+                                   created_at=start + timedelta(minutes=1))
+        self.soon = self.make_task(project, 'in_progress', title='Soon', due_date=today + timedelta(days=3),
+                                   employee=self.other_employee, created_at=start + timedelta(minutes=2))
+        self.undated = self.make_task(project, 'pending', title='Undated', created_at=start + timedelta(minutes=3))
+        self.login(self.supermanager)
+
+    def titles(self, query, url='/api/supermanager/tasks/'):
+        response = self.client.get(f'{url}?{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return [task['title'] for task in response.json()]
+
+    def test_filters(self):
+        today = timezone.now().date()
+        self.assertEqual(self.titles('status=pending,in_progress'), ['Undated', 'Soon', 'Late'])
+        self.assertEqual(self.titles(f'assigned_to={self.other_employee.id}'), ['Soon'])
+        self.assertEqual(self.titles(f'due_from={today}'), ['Soon'])
+        self.assertEqual(self.titles(f'due_to={today}'), ['Done', 'Late'])
+        self.assertEqual(self.titles('overdue=true'), ['Late'])
+        self.assertEqual(self.titles('overdue=false'), ['Undated', 'Soon', 'Done'])
+        self.assertEqual(self.titles('overdue=true&status=completed'), [])
+
+    def test_filters_apply_within_the_role_scope(self):
+        self.login(self.employee)
+        self.assertEqual(self.titles('status=pending', '/api/employee/tasks/'), ['Undated', 'Late'])
+        self.login(self.manager)
+        self.assertEqual(self.titles('overdue=true', '/api/manager/tasks/'), ['Late'])
+
+    def test_ordering_is_whitelisted_and_drives_cursor_pages(self):
+        Task.objects.filter(pk=self.late.pk).update(updated_at=timezone.now() + timedelta(hours=1))
+        self.assertEqual(self.titles('ordering=created_at'), ['Late', 'Done', 'Soon', 'Undated'])
+        self.assertEqual(self.titles('ordering=-updated_at')[0], 'Late')
+
+        page = self.client.get('/api/supermanager/tasks/?ordering=created_at&page_size=3').json()
+        second = self.client.get(page['next']).json()
+        self.assertEqual([t['title'] for t in page['results'] + second['results']],
+                         ['Late', 'Done', 'Soon', 'Undated'])
+
+    def test_invalid_values_are_rejected(self):
+        for query in ('status=open', 'assigned_to=me', 'due_from=tomorrow', 'overdue=maybe',
+                      'ordering=title', 'ordering=--created_at'):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/supermanager/tasks/?{query}')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+    def test_filtered_list_keeps_query_budget(self):
+        with self.assertNumQueries(2):
+            self.client.get('/api/supermanager/tasks/?status=pending&overdue=true&ordering=-updated_at')
+
+
+class TaskRowSerializationTests(TaskflowTestCase):
+    def test_fast_path_matches_task_serializer_bytes(self):
+        project = self.make_project('Alpha')
+        yesterday = timezone.now().date() - timedelta(days=1)
+        self.make_task(project, 'pending', due_date=yesterday, description=None)
+        self.make_task(project, 'completed', due_date=yesterday)
+        self.make_task(project, 'in_progress')
+
+        queryset = Task.objects.select_related('assigned_to', 'assigned_by', 'project')
+        renderer = JSONRenderer()
+        expected = renderer.render(TaskSerializer(queryset, many=True).data)
+        actual = renderer.render(serialize_task_rows(queryset.values(*TASK_ROW_FIELDS)))
+        self.assertEqual(actual, expected)
+
+        self.login(self.supermanager)
+        response = self.client.get('/api/supermanager/tasks/')
+        self.assertEqual(response.content, expected)
+
+
+class ExportTests(TaskflowTestCase):
+    def test_task_export_streams_ndjson_and_csv(self):
+        alpha = self.make_project('Alpha')
+        beta = self.make_project('Beta')
+        self.make_task(alpha, 'completed', title='Done')
+        self.make_task(alpha, 'pending', title='Open')
+        self.make_task(beta, 'pending', title='Elsewhere')
+        self.login(self.supermanager)
+
+        response = self.client.get(f'/api/supermanager/tasks/export/?project={alpha.id}&status=pending,in_progress')
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['title'] for line in lines], ['Open'])
+
+        response = self.client.get('/api/supermanager/tasks/export/?output=csv')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['assigned_to_username'], 'employee')
+
+        today = timezone.now().date()
+        response = self.client.get(f'/api/supermanager/tasks/export/?created_to={today - timedelta(days=1)}')
+        self.assertEqual(b''.join(response.streaming_content), b'')
+        self.assertEqual(self.client.get('/api/supermanager/tasks/export/?created_from=soon').status_code, 400)
+        # Same parsing as the list endpoints
+        self.assertEqual(self.client.get('/api/supermanager/tasks/export/?status=bogus').status_code, 400)
+
+    async def test_exports_stream_asynchronously_under_asgi(self):
+        alpha = await sync_to_async(self.make_project)('Alpha')
+        await sync_to_async(self.make_task)(alpha, 'completed', title='Done')
+        token = await sync_to_async(tokens_for_user)(self.supermanager)
+        headers = {'Authorization': f'Bearer {token.access_token}'}
+
+        response = await self.async_client.get('/api/supermanager/tasks/export/', headers=headers)
+        # A sync iterator would be collected into a list before the first byte
+        self.assertTrue(response.is_async)
+        lines = b''.join([chunk async for chunk in response.streaming_content]).decode().splitlines()
+        self.assertEqual([json.loads(line)['title'] for line in lines], ['Done'])
+
+        response = await self.async_client.get('/api/reports/export/?output=csv', headers=headers)
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(list(csv.DictReader(io.StringIO(content)))[0]['progress'], '100.0')
+
+    def test_task_export_is_supermanager_only(self):
+        self.login(self.manager)
+        self.assertEqual(self.client.get('/api/supermanager/tasks/export/').status_code, 403)
+
+    def test_report_export_is_supermanager_only(self):
+        self.make_project('Alpha')
+        for user in (self.manager, self.employee):
+            self.login(user)
+            self.assertEqual(self.client.get('/api/reports/export/').status_code, 403)
+
+    def test_report_export(self):
+        alpha = self.make_project('Alpha')
+        self.make_task(alpha, 'completed')
+        self.login(self.supermanager)
+        response = self.client.get('/api/reports/export/?output=csv')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows, [{'id': str(alpha.id), 'name': 'Alpha', 'progress': '100.0',
+                                 'total_tasks': '1', 'completed_tasks': '1'}])
+
+
+class BulkTaskTests(TaskflowTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = self.make_project('Alpha')
+        self.other_employee = CustomUser.objects.create_user(
+            'worker', 'worker@example.com', 'password123', full_name='Worker', role='employee'
+        )
+
+    def test_bulk_create(self):
+        self.login(self.manager)
+        payload = [
+            {'title': f'Task {i}', 'project': self.project.id, 'assigned_to': self.employee.id}
+            for i in range(5)
+        ]
+        response = self.client.post('/api/manager/tasks/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(len(response.json()), 5)
+        self.assertEqual(Task.objects.filter(assigned_by=self.manager).count(), 5)
+        self.assertEqual(Activity.objects.filter(action='create').count(), 5)
+
+    def test_bulk_create_reports_errors_per_item(self):
+        self.login(self.manager)
+        payload = [
+            {'title': 'Good', 'project': self.project.id, 'assigned_to': self.employee.id},
+            {'title': 'Bad', 'project': self.project.id, 'assigned_to': self.manager.id},
+        ]
+        response = self.client.post('/api/manager/tasks/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()[0], {})
+        self.assertIn('assigned_to', response.json()[1])
+        self.assertFalse(Task.objects.exists())
+
+    def test_bulk_reassignment_uses_a_fixed_number_of_queries(self):
+        tasks = [self.make_task(self.project, title=f'Task {i}') for i in range(50)]
+        self.login(self.manager)
+        payload = [{'id': task.id, 'assigned_to': self.other_employee.id} for task in tasks]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.patch('/api/manager/tasks/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertLess(len(ctx.captured_queries), 12)
+        self.assertEqual(Task.objects.filter(assigned_to=self.other_employee).count(), 50)
+
+    def test_bulk_status_transition(self):
+        tasks = [self.make_task(self.project) for _ in range(3)]
+        self.login(self.employee)
+        response = self.client.post(
+            '/api/employee/tasks/bulk-status/',
+            {'ids': [task.id for task in tasks], 'status': 'completed'}, format='json'
+        )
+        self.assertEqual(response.json(), {'updated': 3})
+        self.assertEqual(Task.objects.filter(status='completed').count(), 3)
+        self.assertEqual(Activity.objects.filter(action='status_change').count(), 3)
+
+        foreign = self.make_task(self.project, employee=self.other_employee)
+        response = self.client.post(
+            '/api/employee/tasks/bulk-status/', {'ids': [foreign.id], 'status': 'completed'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.post('/api/employee/tasks/bulk/', [], format='json').status_code, 403)
+
+
+class StatelessJWTTests(TaskflowTestCase):
+    def obtain_token(self, username='manager'):
+        response = self.client.post('/api/login/', {'username': username, 'password': 'password123'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['access']
+
+    def use_token(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_claims_authorize_without_loading_the_user(self):
+        project = self.make_project('Alpha')
+        self.make_task(project)
+        self.use_token(self.obtain_token())
+        accessible_project_ids(self.manager)
+
+        # ETag validators and the rows; no user lookup
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/manager/tasks/')
+        self.assertEqual(len(response.json()), 1)
+
+        response = self.client.get('/api/user/')
+        self.assertEqual(response.json()['username'], 'manager')
+
+    def test_writes_work_with_a_claims_user(self):
+        project = self.make_project('Alpha')
+        self.use_token(self.obtain_token())
+        response = self.client.post('/api/manager/tasks/', {
+            'title': 'New', 'project': project.id, 'assigned_to': self.employee.id,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(Task.objects.get().assigned_by, self.manager)
+        self.assertEqual(Activity.objects.get().user, self.manager)
+
+        self.use_token(self.obtain_token('employee'))
+        response = self.client.post('/api/employee/tasks/', {
+            'title': 'Mine', 'project': project.id, 'assigned_to': self.employee.id,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['assigned_to_details']['username'], 'employee')
+
+    def test_role_change_revokes_outstanding_tokens(self):
+        token = self.obtain_token()
+        self.use_token(token)
+        self.assertEqual(self.client.get('/api/manager-dashboard-stats/').status_code, 200)
+
+        # Revoked within the second the token was issued in
+        self.manager.role = 'employee'
+        self.manager.save()
+        self.assertEqual(self.client.get('/api/manager-dashboard-stats/').status_code, 401)
+
+        self.client.credentials()
+        self.use_token(self.obtain_token())
+        self.assertEqual(self.client.get('/api/employee/tasks/').status_code, 200)
+
+    def test_revocations_are_visible_to_every_worker_through_a_shared_cache(self):
+        databases = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'test_cache'}}
+        with override_settings(CACHES=databases):
+            call_command('createcachetable', verbosity=0)
+            self.use_token(self.obtain_token())
+            self.manager.is_active = False
+            self.manager.save()
+            self.assertEqual(self.client.get('/api/manager-dashboard-stats/').status_code, 401)
+            # A fresh backend instance, as another process would have, sees the entry
+            self.assertIsNotNone(caches.create_connection('default').get(f'jwt-revoked:{self.manager.id}'))
+
+    def test_local_memory_cache_is_refused_with_several_workers(self):
+        env = dict(os.environ, WEB_CONCURRENCY='2', CACHE_BACKEND='locmem')
+        result = subprocess.run([sys.executable, '-c', 'import backend.settings'],
+                                env=env, capture_output=True, text=True, cwd=settings.BASE_DIR)
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('ImproperlyConfigured', result.stderr)
+
+    def test_password_change_saved_alone_revokes_outstanding_tokens(self):
+        self.use_token(self.obtain_token())
+        self.manager.set_password('new-password123')
+        self.manager.save(update_fields=['password'])
+        self.assertEqual(self.client.get('/api/manager-dashboard-stats/').status_code, 401)
+
+    def test_tokens_without_claims_fall_back_to_the_database(self):
+        self.use_token(str(RefreshToken.for_user(self.manager).access_token))
+        self.assertEqual(self.client.get('/api/manager-dashboard-stats/').status_code, 200)
+
+
+class LoginPipelineTests(TaskflowTestCase):
+    def login_request(self, password):
+        return self.client.post('/api/login/', {'username': 'manager', 'password': password}, format='json')
+
+    def test_repeated_failures_skip_the_hasher(self):
+        for _ in range(LOGIN_MAX_FAILURES):
+            self.assertEqual(self.login_request('wrong').status_code, 401)
+
+        with mock.patch('tasks.views.authenticate') as authenticate:
+            response = self.login_request('password123')
+        self.assertEqual(response.status_code, 429)
+        authenticate.assert_not_called()
+
+    def test_success_clears_failures(self):
+        for _ in range(LOGIN_MAX_FAILURES - 1):
+            self.login_request('wrong')
+        self.assertEqual(self.login_request('password123').status_code, 200)
+        self.assertEqual(self.login_request('wrong').status_code, 401)
+        self.assertEqual(self.login_request('password123').status_code, 200)
+
+    def test_outdated_hashes_are_upgraded_on_login(self):
+        self.manager.password = make_password('password123', hasher='pbkdf2_sha1')
+        self.manager.save()
+        token = self.client.post('/api/login/', {'username': 'manager', 'password': 'password123'},
+                                 format='json').json()['access']
+
+        self.manager.refresh_from_db()
+        self.assertTrue(self.manager.password.startswith('pbkdf2_sha256$'))
+        # Rehashing keeps the same secret, so it must not revoke the new token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.get('/api/manager-dashboard-stats/').status_code, 200)
+
+
+class AsyncViewTests(TaskflowTestCase):
+    def auth(self, user):
+        return {'Authorization': f'Bearer {tokens_for_user(user).access_token}'}
+
+    async def assert_same_as_sync(self, user, path):
+        await sync_to_async(self.login)(user)
+        expected = await sync_to_async(self.client.get)(f'/api/{path}')
+        # Recompute instead of reading what the sync view cached
+        await cache.aclear()
+        response = await self.async_client.get(f'/api/async/{path}', headers=self.auth(user))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), expected.json())
+
+    async def test_responses_match_sync_views(self):
+        project = await sync_to_async(self.make_project)('Alpha')
+        await sync_to_async(self.make_task)(project, status='completed')
+        await sync_to_async(self.make_task)(project, due_date=timezone.now().date() - timedelta(days=1))
+
+        await self.assert_same_as_sync(self.supermanager, 'supermanager-dashboard-stats/')
+        await self.assert_same_as_sync(self.manager, 'manager-dashboard-stats/')
+        await self.assert_same_as_sync(self.supermanager, 'reports/')
+        await self.assert_same_as_sync(self.supermanager, f'reports/?project={project.id}')
+        await self.assert_same_as_sync(self.employee, 'recent-activity/?limit=5')
+
+    async def test_requires_authentication_and_role(self):
+        response = await self.async_client.get('/api/async/manager-dashboard-stats/')
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get('/api/async/manager-dashboard-stats/', headers=self.auth(self.employee))
+        self.assertEqual(response.status_code, 403)
+        response = await self.async_client.get('/api/async/recent-activity/?before=yesterday',
+                                                headers=self.auth(self.employee))
+        self.assertEqual(response.status_code, 400)
+
+
+class RequestMetricsTests(TaskflowTestCase):
+    def setUp(self):
+        super().setUp()
+        request_metrics.reset()
+
+    def test_server_timing_reports_queries_and_render(self):
+        project = self.make_project('Alpha')
+        self.make_task(project)
+        self.login(self.supermanager)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/supermanager/tasks/')
+        timing = response['Server-Timing']
+        self.assertIn(f'desc="{len(ctx.captured_queries)} queries"', timing)
+        self.assertRegex(
+            timing,
+            r'^db;dur=[\d.]+;desc="\d+ queries", view;dur=[\d.]+;desc="view and serialization", '
+            r'render;dur=[\d.]+, total;dur=[\d.]+$'
+        )
+        # Serialization happens in the view, before the renderer runs
+        with mock.patch('tasks.views.serialize_task_rows', side_effect=lambda rows: time.sleep(0.05) or []):
+            timing = self.client.get('/api/supermanager/tasks/')['Server-Timing']
+        self.assertGreaterEqual(float(re.search(r'view;dur=([\d.]+)', timing).group(1)), 50)
+
+    def test_histogram_is_per_view_and_supermanager_only(self):
+        self.login(self.employee)
+        self.client.get('/api/employee/tasks/')
+        self.client.get('/api/employee/tasks/')
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+
+        self.login(self.supermanager)
+        snapshot = self.client.get('/api/metrics/').json()
+        stats = snapshot['views']['employee-tasks-list']
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(sum(stats['latency_ms'].values()), 2)
+        self.assertEqual(stats['max_queries'], 2)
+        self.assertGreater(stats['avg_bytes'], 0)
+        self.assertGreater(stats['avg_view_ms'], 0)
+
+        self.assertEqual(self.client.delete('/api/metrics/').status_code, 204)
+        self.assertNotIn('employee-tasks-list', self.client.get('/api/metrics/').json()['views'])
+
+    async def test_async_views_are_measured(self):
+        token = await sync_to_async(tokens_for_user)(self.supermanager)
+        response = await self.async_client.get(
+            '/api/async/reports/', headers={'Authorization': f'Bearer {token.access_token}'}
+        )
+        self.assertRegex(response['Server-Timing'], r'desc="[1-9]\d* queries"')
+        stats = request_metrics.snapshot()['views']['async-reports']
+        self.assertGreater(stats['avg_queries'], 0)
+
+
+class EventStreamTests(TaskflowTestCase):
+    def published(self, write):
+        with mock.patch.object(get_broker(), 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                write()
+        return [call.args[0] for call in publish.call_args_list]
+
+    def test_writes_publish_events_scoped_to_the_users_involved(self):
+        other_manager = CustomUser.objects.create_user('other', 'other@example.com', 'x', role='manager')
+        project = self.make_project('Alpha')
+        [message] = self.published(lambda: self.make_task(project))
+        self.assertEqual(message['event'], 'task.created')
+        self.assertEqual(message['data']['project_id'], project.id)
+
+        self.assertTrue(visible_to(message, self.supermanager))
+        self.assertTrue(visible_to(message, self.manager))
+        self.assertTrue(visible_to(message, self.employee))
+        self.assertFalse(visible_to(message, other_manager))
+
+        # Reassigning the project notifies both the old and the new manager
+        project.assigned_to = other_manager
+        [message] = self.published(project.save)
+        self.assertEqual(message['event'], 'project.updated')
+        self.assertTrue(visible_to(message, self.manager))
+        self.assertTrue(visible_to(message, other_manager))
+        self.assertFalse(visible_to(message, self.employee))
+
+    def test_bulk_status_publishes_events(self):
+        project = self.make_project('Alpha')
+        tasks = [self.make_task(project) for _ in range(2)]
+        self.login(self.manager)
+        messages = self.published(lambda: self.client.post(
+            '/api/manager/tasks/bulk-status/', {'ids': [t.id for t in tasks], 'status': 'completed'}, format='json'
+        ))
+        self.assertEqual([m['data']['status'] for m in messages], ['completed', 'completed'])
+
+    def stream_ticket(self, user):
+        token = tokens_for_user(user).access_token
+        response = self.client.post('/api/events/ticket/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 201)
+        return response.json()['ticket']
+
+    async def test_stream_delivers_visible_events(self):
+        project = await sync_to_async(self.make_project)('Alpha')
+        ticket = await sync_to_async(self.stream_ticket)(self.employee)
+        response = await self.async_client.get(f'/api/async/events/?ticket={ticket}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        chunks = aiter(response.streaming_content)
+        self.assertTrue((await anext(chunks)).startswith(b'retry:'))
+        next_chunk = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0.05)  # let the stream subscribe
+
+        def write():
+            with self.captureOnCommitCallbacks(execute=True):
+                self.make_task(project, title='Pushed')
+        await sync_to_async(write)()
+
+        chunk = (await asyncio.wait_for(next_chunk, 5)).decode()
+        self.assertTrue(chunk.startswith('event: task.created\n'))
+        self.assertEqual(json.loads(chunk.split('data: ', 1)[1])['title'], 'Pushed')
+        await response.streaming_content.aclose()
+
+    async def test_stream_requires_authentication(self):
+        response = await self.async_client.get('/api/async/events/')
+        self.assertEqual(response.status_code, 401)
+        # Access tokens are not accepted in the URL
+        token = tokens_for_user(self.employee).access_token
+        response = await self.async_client.get(f'/api/async/events/?token={token}')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_stream_tickets_are_single_use(self):
+        ticket = await sync_to_async(self.stream_ticket)(self.employee)
+        response = await self.async_client.get(f'/api/async/events/?ticket={ticket}')
+        self.assertEqual(response.status_code, 200)
+        await response.streaming_content.aclose()
+        response = await self.async_client.get(f'/api/async/events/?ticket={ticket}')
+        self.assertEqual(response.status_code, 401)
+
+    def test_stream_is_not_served_under_wsgi(self):
+        ticket = self.stream_ticket(self.employee)
+        self.assertEqual(self.client.get(f'/api/async/events/?ticket={ticket}').status_code, 501)
+
+
+class ConditionalGetTests(TaskflowTestCase):
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_task_list_is_not_modified(self):
+        project = self.make_project('Alpha')
+        task = self.make_task(project)
+        other = self.make_task(project)
+        self.login(self.manager)
+        url = '/api/manager/tasks/'
+
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertNotIn('Last-Modified', first)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.revalidate(url, first)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b'')
+        self.assertEqual(len(queries), 1)
+
+        Task.objects.filter(pk=task.pk).update(status='completed', updated_at=timezone.now())
+        third = self.revalidate(url, first)
+        self.assertEqual(third.status_code, 200)
+
+        other.delete()
+        self.assertEqual(self.revalidate(url, third).status_code, 200)
+        # A date-only revalidation can't be answered with 304 over stale data
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(time.time())).status_code, 200)
+
+    def test_related_changes_and_detail(self):
+        project = self.make_project('Alpha')
+        task = self.make_task(project)
+        self.login(self.manager)
+        url = f'/api/manager/tasks/{task.id}/'
+
+        first = self.client.get(url)
+        self.assertEqual(self.revalidate(url, first).status_code, 304)
+        # The payload embeds the assignee's name
+        self.employee.full_name = 'Renamed'
+        self.employee.save()
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+        self.assertEqual(self.client.get('/api/manager/tasks/0/').status_code, 404)
+        self.login(self.supermanager)
+        for path in ('tasks', 'projects', 'users'):
+            self.assertEqual(self.client.get(f'/api/supermanager/{path}/abc/').status_code, 404)
+
+    def test_project_and_user_lists(self):
+        project = self.make_project('Alpha')
+        self.login(self.manager)
+        first = self.client.get('/api/manager/projects/')
+        self.assertEqual(self.revalidate('/api/manager/projects/', first).status_code, 304)
+        self.make_task(project)  # changes the progress figures
+        self.assertEqual(self.revalidate('/api/manager/projects/', first).status_code, 200)
+
+        self.login(self.supermanager)
+        first = self.client.get('/api/supermanager/users/')
+        self.assertEqual(self.revalidate('/api/supermanager/users/', first).status_code, 304)
+        CustomUser.objects.create_user('new', 'new@example.com', 'x', role='employee')
+        self.assertEqual(self.revalidate('/api/supermanager/users/', first).status_code, 200)
+        # Validators are per user
+        self.login(self.manager)
+        self.assertEqual(self.revalidate('/api/supermanager/users/', first).status_code, 200)
+
+
+class ProjectStatsRollupTests(TaskflowTestCase):
+    def stats(self, project):
+        return ProjectStats.objects.values(*COUNTER_FIELDS).get(project=project)
+
+    def test_signals_keep_counts_current(self):
+        alpha = self.make_project('Alpha')
+        beta = self.make_project('Beta')
+        task = self.make_task(alpha, 'pending')
+        self.make_task(alpha, 'completed')
+        self.assertEqual(self.stats(alpha), {
+            'total_tasks': 2, 'pending_tasks': 1, 'in_progress_tasks': 0, 'completed_tasks': 1,
+        })
+
+        task.status = 'in_progress'
+        task.project = beta
+        task.save()
+        self.assertEqual(self.stats(alpha)['total_tasks'], 1)
+        self.assertEqual(self.stats(beta)['in_progress_tasks'], 1)
+
+        task.delete()
+        self.assertEqual(self.stats(beta)['total_tasks'], 0)
+        self.assertEqual(verify_project_stats(), [])
+
+        alpha.delete()
+        self.assertFalse(ProjectStats.objects.filter(project_id=alpha.id).exists())
+
+    def test_bulk_writes_refresh_the_rollup(self):
+        project = self.make_project('Alpha')
+        tasks = [self.make_task(project) for _ in range(3)]
+        self.login(self.manager)
+        self.client.post(
+            '/api/manager/tasks/bulk-status/', {'ids': [t.id for t in tasks[:2]], 'status': 'completed'},
+            format='json'
+        )
+        self.assertEqual(self.stats(project)['completed_tasks'], 2)
+        self.assertEqual(verify_project_stats(), [])
+
+    def test_report_reads_do_not_scan_tasks(self):
+        project = self.make_project('Alpha')
+        self.make_task(project, 'completed')
+        self.login(self.supermanager)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/reports/')
+        # Only the overdue count touches the task table
+        task_queries = [q['sql'] for q in queries if '"tasks_task"' in q['sql']]
+        self.assertEqual(len(task_queries), 1)
+        self.assertIn('"tasks_task"."due_date" <', task_queries[0])
+
+    def test_rebuild_command_repairs_drift(self):
+        project = self.make_project('Alpha')
+        self.make_task(project, 'completed')
+        ProjectStats.objects.filter(project=project).update(completed_tasks=7)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_project_stats', '--check', stdout=io.StringIO(), stderr=io.StringIO())
+        call_command('rebuild_project_stats', stdout=io.StringIO())
+        self.assertEqual(self.stats(project)['completed_tasks'], 1)
+
+    def test_failed_counter_update_rolls_back_the_task_write(self):
+        project = self.make_project('Alpha')
+        task = self.make_task(project)
+        self.login(self.manager)
+        with mock.patch('tasks.signals.apply_task_change', side_effect=RuntimeError('rollup down')):
+            with self.assertRaises(RuntimeError):
+                self.client.post('/api/manager/tasks/', {
+                    'title': 'New', 'project': project.id, 'assigned_to': self.employee.id,
+                }, format='json')
+            with self.assertRaises(RuntimeError):
+                self.client.patch(f'/api/manager/tasks/{task.id}/', {'status': 'completed'}, format='json')
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'pending')
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertEqual(verify_project_stats(), [])
+
+    def test_project_delete_skips_per_task_work(self):
+        self.login(self.supermanager)
+
+        def delete_project(task_count):
+            project = self.make_project(f'Doomed {task_count}')
+            for _ in range(task_count):
+                self.make_task(project, title='Doomed task')
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.delete(f'/api/supermanager/projects/{project.id}/')
+            self.assertEqual(response.status_code, 204)
+            return len(queries)
+
+        self.assertEqual(delete_project(2), delete_project(20))
+        self.assertEqual(accessible_project_ids(self.employee), frozenset())
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM task_search')
+                self.assertEqual(cursor.fetchone()[0], 0)
+        self.assertEqual(verify_project_stats(), [])
+
+
+class DatabaseProfileTests(TestCase):
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite profile')
+    def test_sqlite_connections_apply_the_profile(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+        self.assertTrue(connection.settings_dict['CONN_HEALTH_CHECKS'])
+
+    def test_asgi_entry_point_disables_persistent_connections(self):
+        script = 'import backend.asgi; from django.conf import settings; print(settings.DATABASES["default"]["CONN_MAX_AGE"])'
+        env = {name: value for name, value in os.environ.items() if name != 'DB_CONN_MAX_AGE'}
+        result = subprocess.run([sys.executable, '-c', script],
+                                env=env, capture_output=True, text=True, cwd=settings.BASE_DIR)
+        self.assertEqual(result.stdout.strip(), '0', result.stderr)
+
+
+@override_settings(REPLICA_DATABASE='replica')
+class ReplicaRoutingTests(TaskflowTestCase):
+    # A second SQLite file stands in for the replica. It is not kept in sync,
+    # so where a row is visible tells which database a request read. The
+    # alias only exists while this class runs, so the test runner never
+    # creates a test database for it.
+    @classmethod
+    def setUpClass(cls):
+        cls.replica_dir = tempfile.TemporaryDirectory()
+        connections.settings['replica'] = dict(
+            connections['default'].settings_dict, NAME=os.path.join(cls.replica_dir.name, 'replica.sqlite3')
+        )
+        call_command('migrate', database='replica', verbosity=0)
+        cls.databases = {'default', 'replica'}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        cls.replica_dir.cleanup()
+
+    def setUp(self):
+        super().setUp()
+        self.primary_task = self.make_task(self.make_project('Primary'), title='On the primary')
+        # bulk_create skips the signals, which would write to default
+        CustomUser.objects.using('replica').bulk_create([self.supermanager, self.manager, self.employee])
+        replica_project, _ = Project.objects.using('replica').bulk_create([
+            Project(name=name, description='', created_by=self.supermanager, assigned_to=self.manager)
+            for name in ('Replica', 'Replica 2')
+        ])
+        Task.objects.using('replica').bulk_create([Task(
+            title='On the replica', project=replica_project, assigned_by=self.manager, assigned_to=self.employee
+        )])
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens_for_user(self.supermanager).access_token}')
+
+    def titles(self):
+        return [task['title'] for task in self.client.get('/api/supermanager/tasks/').json()]
+
+    def test_lists_and_read_only_views_read_the_replica(self):
+        self.assertEqual(self.titles(), ['On the replica'])
+        self.assertEqual(self.client.get('/api/supermanager-dashboard-stats/').json()['active_projects'], 2)
+        projects = self.client.get('/api/reports/').json()['projectsProgress']
+        self.assertEqual({project['name'] for project in projects}, {'Replica', 'Replica 2'})
+        # Detail views and writes stay on the primary
+        self.assertEqual(self.client.get(f'/api/supermanager/tasks/{self.primary_task.id}/').status_code, 200)
+
+    def test_client_reads_its_own_writes(self):
+        response = self.client.post('/api/supermanager/tasks/bulk-status/',
+                                    {'ids': [self.primary_task.id], 'status': 'completed'}, format='json')
+        self.assertEqual(response.json(), {'updated': 1})
+        self.assertEqual(self.titles(), ['On the primary'])
+
+        # Other clients are not pinned
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens_for_user(self.manager).access_token}')
+        self.assertEqual([t['title'] for t in self.client.get('/api/manager/tasks/').json()], ['On the replica'])
+
+    def test_reads_after_a_write_in_the_same_request_use_the_primary(self):
+        state = RoutingState()
+        state.use_replica = True
+        token = routing_state.set(state)
+        try:
+            self.assertEqual(Task.objects.get().title, 'On the replica')
+            Task.objects.filter(pk=self.primary_task.pk).update(status='completed')
+            self.assertEqual(Task.objects.get().title, 'On the primary')
+        finally:
+            routing_state.reset(token)
+
+    def test_without_a_replica_everything_reads_default(self):
+        with override_settings(REPLICA_DATABASE=None):
+            self.assertEqual(self.titles(), ['On the primary'])
+
+
+class IndexBenchmarkTests(SimpleTestCase):
+    def test_benchmark_runs_against_the_current_schema(self):
+        result = subprocess.run(
+            [sys.executable, 'indexes.py', '--tasks', '300', '--projects', '5', '--managers', '2',
+             '--employees', '5', '--repeat', '1'],
+            cwd=settings.BASE_DIR / 'benchmarks', capture_output=True, text=True, timeout=300,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('employee/tasks', result.stdout)
+
+
+class GenerateOrgTests(TaskflowTestCase):
+    def test_generates_a_deterministic_consistent_organisation(self):
+        out = io.StringIO()
+        options = dict(supermanagers=1, managers=3, employees=10, projects=4, tasks=60, seed=7, stdout=out)
+        call_command('generate_org', prefix='a', **options)
+        self.assertIn('60 tasks', out.getvalue())
+        call_command('generate_org', prefix='b', **options)
+
+        def fingerprint(prefix):
+            tasks = Task.objects.filter(assigned_to__username__startswith=f'{prefix}-').order_by('id')
+            return [
+                (t.title, t.status, t.due_date, t.project.name, t.assigned_to.username.split('-', 1)[1])
+                for t in tasks
+            ]
+
+        self.assertEqual(len(fingerprint('a')), 60)
+        self.assertEqual(fingerprint('a'), fingerprint('b'))
+        # Managers only assign tasks in their own projects
+        self.assertFalse(Task.objects.exclude(assigned_by_id=F('project__assigned_to_id')).exists())
+        self.assertEqual(verify_project_stats(), [])
+
+        # Generated feed entries have the shape the signals write
+        generated = {
+            (activity.action, frozenset(activity.details))
+            for activity in Activity.objects.filter(content_type='task')
+        }
+        self.login(self.manager)
+        project = self.make_project('Alpha')
+        task_id = self.client.post('/api/manager/tasks/', {
+            'title': 'New', 'project': project.id, 'assigned_to': self.employee.id,
+        }, format='json').json()['id']
+        self.client.patch(f'/api/manager/tasks/{task_id}/', {'status': 'completed'}, format='json')
+        recorded = {
+            (activity.action, frozenset(activity.details))
+            for activity in Activity.objects.filter(content_type='task', object_id=task_id)
+        }
+        self.assertEqual(generated, recorded)
+
+        with self.assertRaises(CommandError):
+            call_command('generate_org', prefix='a', **options)
+
+
+class TaskSnapshotTests(TaskflowTestCase):
+    def test_incremental_snapshots_and_trend_series(self):
+        other_employee = CustomUser.objects.create_user('other', 'other@example.com', 'x', role='employee')
+        alpha = self.make_project('Alpha')
+        beta = self.make_project('Beta')
+        today = timezone.now().date()
+        first_day = today - timedelta(days=2)
+        task = self.make_task(alpha, 'pending', due_date=today - timedelta(days=1))
+        self.make_task(alpha, 'completed', employee=other_employee)
+        self.make_task(beta, 'in_progress')
+        self.assertEqual(take_snapshot(), (3, None))
+        # Stand in for a run two days ago; only today's counts can be recorded
+        TaskSnapshot.objects.update(date=first_day)
+
+        task.status = 'completed'
+        task.save()
+        # Only Alpha changed since the first snapshot
+        self.assertEqual(take_snapshot(today), (3, 1))
+        with self.assertRaises(CommandError):
+            call_command('snapshot_tasks', day=first_day.isoformat())
+        self.assertEqual(TaskSnapshot.objects.filter(date=first_day).count(), 3)
+
+        self.login(self.supermanager)
+        response = self.client.get('/api/reports/trends/', {'from': first_day.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['labels'], [first_day.isoformat(), today.isoformat()])
+        self.assertEqual(data['series']['completed_tasks'], [1, 2])
+        self.assertEqual(data['series']['overdue_tasks'], [1, 0])
+        self.assertEqual(data['series']['total_tasks'], [3, 3])
+
+        response = self.client.get('/api/reports/trends/', {'assigned_to': other_employee.id})
+        self.assertEqual(response.json()['series']['total_tasks'], [1, 1])
+
+        # Employees only see their own tasks
+        self.login(self.employee)
+        response = self.client.get('/api/reports/trends/', {'from': first_day.isoformat()})
+        self.assertEqual(response.json()['series']['total_tasks'], [2, 2])
+
+    def test_trend_reads_never_touch_tasks(self):
+        self.make_task(self.make_project('Alpha'))
+        take_snapshot()
+        self.login(self.manager)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/reports/trends/')
+        self.assertFalse(any('"tasks_task"' in query['sql'] for query in queries))
+
+    def test_rejects_bad_ranges(self):
+        self.login(self.supermanager)
+        self.assertEqual(self.client.get('/api/reports/trends/?from=last-week').status_code, 400)
+        self.assertEqual(self.client.get('/api/reports/trends/?from=2025-02-30').status_code, 400)
+        self.assertEqual(
+            self.client.get('/api/reports/trends/?from=2020-01-01&to=2025-01-01').status_code, 400
+        )
+
+
+class SearchTests(TaskflowTestCase):
+    def search(self, **params):
+        response = self.client.get('/api/search/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_ranked_scoped_and_kept_in_sync(self):
+        other_employee = CustomUser.objects.create_user('other', 'other@example.com', 'x', role='employee')
+        project = self.make_project('Website relaunch')
+        mine = self.make_task(project, title='Invoice export', description='CSV invoice export for finance')
+        self.make_task(project, title='Landing page', description='Mention the invoice portal')
+        theirs = self.make_task(project, title='Invoice reminders', employee=other_employee)
+
+        self.login(self.employee)
+        results = self.search(q='invoice')['results']
+        self.assertEqual([row['id'] for row in results][0], mine.id)
+        self.assertNotIn(theirs.id, [row['id'] for row in results])
+        self.assertEqual(set(results[0]), set(TaskSerializer(mine).data))
+
+        # Prefix match on the last word while typing
+        self.assertEqual(len(self.search(q='invo')['results']), 2)
+
+        mine.title = 'Quarterly payout'
+        mine.description = ''
+        mine.save()
+        self.assertEqual([row['id'] for row in self.search(q='payout')['results']], [mine.id])
+        mine.delete()
+        self.assertEqual(self.search(q='payout')['results'], [])
+
+        projects = self.search(q='relaunch', type='projects')['results']
+        self.assertEqual([row['id'] for row in projects], [project.id])
+
+    def test_pagination_and_bad_input(self):
+        project = self.make_project('Alpha')
+        for i in range(5):
+            self.make_task(project, title=f'Report {i}')
+        self.login(self.supermanager)
+
+        page = self.search(q='report', limit=2)
+        self.assertEqual(len(page['results']), 2)
+        self.assertIn('offset=2', page['next'])
+        self.assertIsNone(self.search(q='report', limit=2, offset=4)['next'])
+
+        # FTS syntax in the input is treated as plain words
+        self.assertEqual(len(self.search(q='"report* (')['results']), 5)
+        self.assertEqual(self.client.get('/api/search/?q=').status_code, 400)
+        self.assertEqual(self.client.get('/api/search/?q=x&type=users').status_code, 400)
+
+    def test_bulk_created_tasks_are_searchable(self):
+        project = self.make_project('Alpha')
+        self.login(self.manager)
+        self.client.post('/api/manager/tasks/bulk/', [
+            {'title': 'Migrate mailboxes', 'project': project.id, 'assigned_to': self.employee.id},
+        ], format='json')
+        self.assertEqual(len(self.search(q='mailboxes')['results']), 1)
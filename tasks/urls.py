@@ -1,7 +1,8 @@
 
 from django.urls import path, include 
 from rest_framework.permissions import AllowAny
-from .views import ReportView
+from .views import EventStreamTicketView, ReportView, ReportExportView, RequestMetricsView, SearchView, TrendReportView
+from . import async_views
 from .views import (
     LoginView, 
     UserView,
@@ -15,7 +16,7 @@ from .views import (
     ManagerEmployeeListView ,
      ManagerDashboardStats,
      EmployeeTaskViewSet,
-     
+     ActivityFeedView,
 )
 from rest_framework.routers import DefaultRouter
 
@@ -36,7 +37,18 @@ urlpatterns = [
      path('manager/employees/', ManagerEmployeeListView.as_view(), name='manager-employees'),
       path('manager-dashboard-stats/', ManagerDashboardStats.as_view(), name='manager-dashboard-stats'),
     path('recent-activity/', RecentActivityView.as_view(), name='recent-activity'),
+    path('activity/', ActivityFeedView.as_view(), name='activity-feed'),
     path('reports/', ReportView.as_view(), name='reports'),
+    path('reports/export/', ReportExportView.as_view(), name='reports-export'),
+    path('reports/trends/', TrendReportView.as_view(), name='reports-trends'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('metrics/', RequestMetricsView.as_view(), name='request-metrics'),
+    path('async/supermanager-dashboard-stats/', async_views.supermanager_dashboard_stats, name='async-supermanager-dashboard-stats'),
+    path('async/manager-dashboard-stats/', async_views.manager_dashboard_stats, name='async-manager-dashboard-stats'),
+    path('async/recent-activity/', async_views.recent_activity, name='async-recent-activity'),
+    path('async/reports/', async_views.report, name='async-reports'),
+    path('events/ticket/', EventStreamTicketView.as_view(), name='event-stream-ticket'),
+    path('async/events/', async_views.events, name='async-events'),
     path('', include(router.urls)),
 ]
 # urls.py
@@ -3,33 +3,80 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
+from .authentication import tokens_for_user
+from .login import LOGIN_LOCKOUT_SECONDS, LoginAttemptGuard
 from django.contrib.auth import authenticate
 from django.utils import timezone
 from datetime import timedelta
-from django.utils.timezone import now
-from django.db.models import Q, Count, F, Case, When, FloatField
+from django.utils.dateparse import parse_date, parse_datetime
+from django.db import transaction
+from django.db.models import Q, Count, F, Case, When, FloatField, Max
 from django.db.models.functions import Coalesce
-from .models import CustomUser, Project, Task
-from .serializers import UserSerializer, ProjectSerializer, TaskSerializer
+from .models import CustomUser, Project, Task, Activity
+from .serializers import UserSerializer, ProjectSerializer, TaskSerializer, ManagerProjectSerializer, ActivitySerializer
+from .serializers import TASK_ROW_FIELDS, serialize_task_rows
+from .reports import build_report, annotate_project_progress, trend_series
+from .dashboard import supermanager_stats, manager_stats
+from .activity import ActivityLogMixin, recent_activity
+from .conditional import ConditionalGetMixin
+from .filters import TaskFilterBackend
+from .pagination import ActivityFeedPagination, OptInCursorPagination, SearchPagination, UserCursorPagination
+from .scopes import (
+    ProjectScopePermission, WriteRolePermission, can_access_project, scoped_project_queryset,
+    scoped_snapshot_queryset, scoped_task_queryset,
+)
+from .search import search
+from .exports import export_project_progress, export_tasks, served_over_asgi
+from .events import EVENT_STREAM_TICKET_SECONDS, issue_stream_ticket
+from .bulk import BulkTaskWriter
+from .instrumentation import registry as request_metrics
 from django.db.models.functions import TruncDate
 from rest_framework import generics  # Add this import
+def request_user_instance(request):
+    """
+    The CustomUser row behind request.user. With stateless JWT auth
+    request.user is built from token claims, so the row is only loaded
+    when a view really needs it (e.g. to assign it to a foreign key).
+    """
+    if isinstance(request.user, CustomUser):
+        return request.user
+    if not hasattr(request, '_user_instance'):
+        request._user_instance = CustomUser.objects.get(pk=request.user.id)
+    return request._user_instance
+
+
+class AtomicWritesMixin:
+    """
+    Runs each create/update/destroy in one transaction, so the work its
+    signals do (ProjectStats counters, search index, cascaded task deletes)
+    commits or rolls back together with the row itself.
+    """
+
+    def create(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().create(request, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().update(request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().destroy(request, *args, **kwargs)
+
+
 class SuperManagerDashboardStats(APIView):
     permission_classes = [IsAuthenticated]
+    replica_reads = True  # see tasks.routing
 
     def get(self, request):
         if request.user.role != 'supermanager':
             return Response({'error': 'Unauthorized'}, status=403)
 
-        stats = {
-            'total_users': CustomUser.objects.count(),
-            'active_projects': Project.objects.count(),
-            'pending_tasks': Task.objects.filter(status='pending').count(),
-            'in_progress_tasks': Task.objects.filter(status='in_progress').count(),
-            'completed_tasks': Task.objects.filter(status='completed').count()
-        }
-        return Response(stats)
+        return Response(supermanager_stats())
 
 
 class LoginView(APIView):
@@ -37,12 +84,27 @@ class LoginView(APIView):
         username = request.data.get('username')
         password = request.data.get('password')
 
+        # Missing credentials can never match; don't spend a hash on them
+        if not username or not password:
+            return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+
+        guard = LoginAttemptGuard(username)
+        if guard.is_locked():
+            return Response(
+                {'error': 'Too many failed login attempts. Try again later.'},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={'Retry-After': str(LOGIN_LOCKOUT_SECONDS)}
+            )
+
         user = authenticate(username=username, password=password)
 
         if not user:
+            guard.record_failure()
             return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
 
-        refresh = RefreshToken.for_user(user)
+        guard.reset()
+
+        refresh = tokens_for_user(user)
         return Response({
             'user': UserSerializer(user).data,
             'refresh': str(refresh),
@@ -54,34 +116,38 @@ class UserView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        serializer = UserSerializer(request.user)
+        serializer = UserSerializer(request_user_instance(request))
         return Response(serializer.data)
 
 
-class SuperManagerUserViewSet(viewsets.ModelViewSet):
+class SuperManagerUserViewSet(AtomicWritesMixin, ConditionalGetMixin, ActivityLogMixin, viewsets.ModelViewSet):
     serializer_class = UserSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, WriteRolePermission]
+    write_role = 'supermanager'
+    pagination_class = UserCursorPagination
     
+
     def get_queryset(self):
-        if self.request.user.role == 'supermanager':
-            return CustomUser.objects.all().order_by('-date_joined')  # Newest first
-        return CustomUser.objects.none()
+        if self.request.user.role != 'supermanager':
+            return CustomUser.objects.none()
+
+        queryset = CustomUser.objects.all().order_by('-date_joined')  # Newest first
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        
         # For the dashboard, return only active users
-        if request.query_params.get('dashboard') == 'true':
+        if self.action == 'list' and self.request.query_params.get('dashboard') == 'true':
             queryset = queryset.filter(is_active=True)
-            
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return queryset
 
 
-class SuperManagerProjectViewSet(viewsets.ModelViewSet):
-    queryset = Project.objects.all()
+class SuperManagerProjectViewSet(AtomicWritesMixin, ConditionalGetMixin, ActivityLogMixin, viewsets.ModelViewSet):
     serializer_class = ProjectSerializer
-    permission_classes = [IsAuthenticated]
+    # Managers and employees may read the projects in their scope, not write them
+    permission_classes = [IsAuthenticated, WriteRolePermission, ProjectScopePermission]
+    write_role = 'supermanager'
+    pagination_class = OptInCursorPagination
+
+    def get_queryset(self):
+        return scoped_project_queryset(self.request.user)
 
     def create(self, request, *args, **kwargs):
         try:
@@ -96,7 +162,8 @@ class SuperManagerProjectViewSet(viewsets.ModelViewSet):
             serializer.is_valid(raise_exception=True)
             
             # Set the created_by field to the current user
-            serializer.save(created_by=request.user)
+            with transaction.atomic():
+                serializer.save(created_by_id=request.user.id)
             
             return Response(serializer.data, status=status.HTTP_201_CREATED)
             
@@ -108,26 +175,104 @@ class SuperManagerProjectViewSet(viewsets.ModelViewSet):
 
 
 
-class SuperManagerTaskViewSet(viewsets.ModelViewSet):
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+
+class RoleScopedTaskViewSet(AtomicWritesMixin, ConditionalGetMixin, ActivityLogMixin, viewsets.ModelViewSet):
+    """Task endpoints share one queryset builder; subclasses pick the role."""
+    # Task payloads embed the project name and both users' names
+    validator_aggregates = {
+        'count': Count('pk'),
+        'updated_at': Max('updated_at'),
+        'project_updated_at': Max('project__updated_at'),
+        'assigned_to_updated_at': Max('assigned_to__updated_at'),
+        'assigned_by_updated_at': Max('assigned_by__updated_at'),
+    }
     serializer_class = TaskSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, WriteRolePermission, ProjectScopePermission]
+    pagination_class = OptInCursorPagination
+    # ?status=, ?assigned_to=, ?due_from=/?due_to=, ?overdue=, ?ordering=
+    filter_backends = [TaskFilterBackend]
+    scope_role = None
+    bulk_limit = 500
+
+    @property
+    def write_role(self):
+        return self.scope_role
 
     def get_queryset(self):
-        if self.request.user.role != 'supermanager':
-            return Task.objects.none()
-            
-        queryset = Task.objects.select_related(
-            'assigned_to', 'assigned_by', 'project'
-        ).order_by('-created_at')
-        
-        project_id = self.request.query_params.get('project')
-        if project_id:
-            queryset = queryset.filter(project_id=project_id)
-            
-        return queryset
+        return scoped_task_queryset(
+            self.request.user,
+            self.scope_role,
+            project_id=self.request.query_params.get('project'),
+        )
+
+    def check_project_scope(self, serializer):
+        # The task's new project must be in scope too, not just its current one
+        project = serializer.validated_data.get('project')
+        if project is not None and not can_access_project(self.request.user, project.pk):
+            raise PermissionDenied({'error': 'Unauthorized'})
 
     def perform_create(self, serializer):
-        serializer.save(assigned_by=self.request.user)
+        self.check_project_scope(serializer)
+        serializer.save()
+
+    def perform_update(self, serializer):
+        self.check_project_scope(serializer)
+        serializer.save()
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(self.list_rows, request, *args, **kwargs)
+
+    def list_rows(self, request, *args, **kwargs):
+        # Read-only listings skip TaskSerializer and map flat rows directly
+        queryset = self.filter_queryset(self.get_queryset()).values(*TASK_ROW_FIELDS)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serialize_task_rows(page))
+        return Response(serialize_task_rows(queryset))
+
+    def get_bulk_writer(self):
+        return BulkTaskWriter(self.request.user, self.get_queryset(), self.bulk_limit)
+
+    def _bulk_response(self, tasks, status_code):
+        rows = Task.objects.filter(id__in=[task.id for task in tasks]).values(*TASK_ROW_FIELDS)
+        return Response(serialize_task_rows(rows), status=status_code)
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk')
+    def bulk(self, request):
+        # Bulk create (POST) / partial update (PATCH) of a list of tasks
+        if request.user.role != self.scope_role or self.scope_role == 'employee':
+            return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+
+        writer = self.get_bulk_writer()
+        if request.method == 'POST':
+            return self._bulk_response(writer.create(request.data), status.HTTP_201_CREATED)
+        return self._bulk_response(writer.update(request.data), status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='bulk-status')
+    def bulk_status(self, request):
+        if request.user.role != self.scope_role:
+            return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+        return Response({'updated': self.get_bulk_writer().set_status(request.data)})
+
+
+class SuperManagerTaskViewSet(RoleScopedTaskViewSet):
+    scope_role = 'supermanager'
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            return Response({'error': 'output must be ndjson or csv'}, status=status.HTTP_400_BAD_REQUEST)
+        if request.user.role != 'supermanager':
+            return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+        # ?project= through get_queryset, the rest through TaskFilterBackend
+        return export_tasks(self.filter_queryset(self.get_queryset()), output, served_over_asgi(request))
+
+    def perform_create(self, serializer):
+        self.check_project_scope(serializer)
+        serializer.save(assigned_by_id=self.request.user.id)
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -135,206 +280,187 @@ class SuperManagerTaskViewSet(viewsets.ModelViewSet):
         return context
 
 class RecentActivityView(APIView):
+    # The dashboard widget, built from the task/project/user rows themselves;
+    # the Activity audit log is paged through ActivityFeedView (api/activity/)
     permission_classes = [IsAuthenticated]
+    replica_reads = True  # see tasks.routing
+    max_limit = 100
 
     def get(self, request):
         # Get limit parameter from request, default to 10
-        limit = int(request.GET.get('limit', 10))
-        
-        # Get tasks, projects, and users that were updated or created recently
-        task_qs = Task.objects.filter(
-            Q(created_at__gte=now() - timedelta(days=30)) | 
-            Q(updated_at__gte=now() - timedelta(days=30))
-        ).select_related('assigned_by', 'assigned_to', 'project')
-
-        project_qs = Project.objects.filter(
-            Q(created_at__gte=now() - timedelta(days=30)) | 
-            Q(updated_at__gte=now() - timedelta(days=30))
-        ).select_related('created_by')
-
-        # Get recently created users
-        user_qs = CustomUser.objects.filter(
-            date_joined__gte=now() - timedelta(days=30)
-        )
+        try:
+            limit = min(max(int(request.GET.get('limit', 10)), 1), self.max_limit)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Optional cursor: only return items older than this timestamp
+        before = request.GET.get('before')
+        if before:
+            before = parse_datetime(before)
+            if before is None:
+                return Response(
+                    {'error': 'before must be an ISO 8601 timestamp'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if timezone.is_naive(before):
+                before = timezone.make_aware(before)
 
-        activities = []
-
-        # Process tasks - CRITICAL: Show task completion as manager's action
-        for task in task_qs:
-            # For task creation
-            if task.created_at >= now() - timedelta(days=1):  # Created recently
-                activities.append({
-                    "id": f"task_{task.id}_created",
-                    "type": "task",
-                    "title": f"Task created: {task.title}",
-                    "description": f"Assigned to {task.assigned_to.full_name or task.assigned_to.username}",
-                    "timestamp": task.created_at,
-                    "user": task.assigned_by.full_name or task.assigned_by.username,
-                    "user_role": task.assigned_by.role,
-                    "status": task.status,
-                    "action": "created",
-                    "task_title": task.title,
-                    "project_name": task.project.name if task.project else "No Project",
-                    "assigned_to": task.assigned_to.full_name or task.assigned_to.username
-                })
-            
-            # For task completion - ATTRIBUTE TO MANAGER, not employee
-            if (task.status == 'completed' and 
-                task.updated_at >= now() - timedelta(days=1) and
-                task.updated_at != task.created_at):  # Ensure it was updated after creation
-                
-                activities.append({
-                    "id": f"task_{task.id}_completed",
-                    "type": "task",
-                    "title": f"Task completed: {task.title}",
-                    "description": f"Completed by team under {task.assigned_by.full_name or task.assigned_by.username}",
-                    "timestamp": task.updated_at,
-                    "user": task.assigned_by.full_name or task.assigned_by.username,  # Show MANAGER, not employee
-                    "user_role": task.assigned_by.role,  # Manager's role
-                    "status": "completed",
-                    "action": "completed",
-                    "task_title": task.title,
-                    "project_name": task.project.name if task.project else "No Project",
-                    "completed_by": task.assigned_to.full_name or task.assigned_to.username  # Optional: show who executed
-                })
-
-        # Process projects
-        for project in project_qs:
-            action = "updated" if project.updated_at != project.created_at else "created"
-            activities.append({
-                "id": f"project_{project.id}",
-                "type": "project",
-                "title": f"Project {action}: {project.name}",
-                "description": project.description,
-                "timestamp": project.updated_at if action == "updated" else project.created_at,
-                "user": project.created_by.full_name or project.created_by.username,
-                "user_role": project.created_by.role,
-                "status": "active",
-                "action": action,
-                "project_name": project.name
-            })
-
-        # Process user creation
-        for user in user_qs:
-            activities.append({
-                "id": f"user_{user.id}",
-                "type": "user",
-                "title": f"User created: {user.full_name or user.username}",
-                "description": f"New {user.role} account created",
-                "timestamp": user.date_joined,
-                "user": "System",
-                "user_role": "supermanager",
-                "status": "active" if user.is_active else "inactive",
-                "action": "created",
-                "target_user": user.full_name or user.username,
-                "user_role_created": user.role
-            })
-
-        # Sort by timestamp descending and apply limit
-        activities.sort(key=lambda x: x['timestamp'], reverse=True)
-        return Response(activities[:limit])
+        return Response(recent_activity(limit, before))
+
+class ActivityFeedView(generics.ListAPIView):
+    replica_reads = True  # see tasks.routing
+    serializer_class = ActivitySerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = ActivityFeedPagination
+
+    def get_queryset(self):
+        queryset = Activity.objects.select_related('user')
+        # Supermanagers see the whole log, everyone else only their own actions
+        if self.request.user.role != 'supermanager':
+            queryset = queryset.filter(user_id=self.request.user.id)
+
+        content_type = self.request.query_params.get('content_type')
+        if content_type:
+            queryset = queryset.filter(content_type=content_type)
+        return queryset
 
 class ReportView(APIView):
+    replica_reads = True  # see tasks.routing
     def get(self, request):
         project_id = request.query_params.get('project')
-        
-        # Get all projects for the filter dropdown
-        all_projects = Project.objects.all()
-        
-        # Base queryset with optional project filter
-        tasks_queryset = Task.objects.all()
-        if project_id:
-            tasks_queryset = tasks_queryset.filter(project_id=project_id)
-        
-        # Calculate basic statistics
-        total_tasks = tasks_queryset.count()
-        completed_tasks = tasks_queryset.filter(status='completed').count()
-        pending_tasks = tasks_queryset.filter(status='pending').count()
-        in_progress_tasks = tasks_queryset.filter(status='in_progress').count()
-        overdue_tasks = tasks_queryset.filter(
-            Q(due_date__lt=timezone.now().date()) & 
-            ~Q(status='completed')
-        ).count()
-        
-        # Status distribution for chart
-        status_labels = ['Pending', 'In Progress', 'Completed', 'Overdue']
-        status_data = [
-            pending_tasks,
-            in_progress_tasks,
-            completed_tasks,
-            overdue_tasks
-        ]
-        
-        # Projects progress
-        projects_queryset = Project.objects.all()
-        if project_id:
-            projects_queryset = projects_queryset.filter(id=project_id)
-            
-        projects_progress = []
-        for project in projects_queryset:
-            project_tasks = project.tasks.all()
-            total = project_tasks.count()
-            completed = project_tasks.filter(status='completed').count()
-            
-            progress = 0
-            if total > 0:
-                progress = (completed / total) * 100
-                
-            projects_progress.append({
-                'id': project.id,
-                'name': project.name,
-                'progress': progress,
-                'total_tasks': total,
-                'completed_tasks': completed
-            })
-        
-        response_data = {
-            'stats': {
-                'total_tasks': total_tasks,
-                'completed_tasks': completed_tasks,
-                'pending_tasks': pending_tasks,
-                'in_progress_tasks': in_progress_tasks,
-                'overdue_tasks': overdue_tasks,
-            },
-            'statusDistribution': {
-                'labels': status_labels,
-                'data': status_data
-            },
-            'projectsProgress': projects_progress,
-            'allProjects': [{'id': p.id, 'name': p.name} for p in all_projects],
-        }
-        
-        return Response(response_data)
-class ManagerProjectViewSet(viewsets.ModelViewSet):
-    serializer_class = ProjectSerializer
+        return Response(build_report(project_id))
+
+
+class SearchView(APIView):
+    # GET search/?q=...&type=tasks|projects, best matches first
+    replica_reads = True  # see tasks.routing
+    def get(self, request):
+        text = request.query_params.get('q', '').strip()
+        kind = request.query_params.get('type', 'tasks')
+        if not text:
+            return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if kind not in ('tasks', 'projects'):
+            return Response({'error': 'type must be tasks or projects'}, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = SearchPagination()
+        if kind == 'tasks':
+            tasks = scoped_task_queryset(request.user, request.user.role)
+            page = paginator.paginate_queryset(search(tasks, text).values(*TASK_ROW_FIELDS), request, self)
+            data = serialize_task_rows(page)
+        else:
+            projects = search(scoped_project_queryset(request.user), text)
+            data = ProjectSerializer(paginator.paginate_queryset(projects, request, self), many=True).data
+        return paginator.get_paginated_response(data)
+
+
+class EventStreamTicketView(APIView):
+    """Single-use ticket for opening api/async/events/ without a token in the URL."""
     permission_classes = [IsAuthenticated]
 
-    def get_queryset(self):
+    def post(self, request):
+        return Response(
+            {'ticket': issue_stream_ticket(request.auth), 'expires_in': EVENT_STREAM_TICKET_SECONDS},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class RequestMetricsView(APIView):
+    # Per-view latency histogram and query figures of this worker process
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role != 'supermanager':
+            return Response({'error': 'Unauthorized'}, status=403)
+        return Response(request_metrics.snapshot())
+
+    def delete(self, request):
+        if request.user.role != 'supermanager':
+            return Response({'error': 'Unauthorized'}, status=403)
+        request_metrics.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class TrendReportView(APIView):
+    # Daily series from the snapshot table (manage.py snapshot_tasks)
+    replica_reads = True  # see tasks.routing
+    default_days = 30
+    max_days = 366
+
+    def get(self, request):
+        try:
+            end = self.parse_day('to') or timezone.now().date()
+            start = self.parse_day('from') or end - timedelta(days=self.default_days - 1)
+        except ValueError:
+            return Response({'error': 'from and to must be YYYY-MM-DD dates'}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end or (end - start).days >= self.max_days:
+            return Response(
+                {'error': f'from must not be after to, and the range is limited to {self.max_days} days'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        snapshots = scoped_snapshot_queryset(request.user)
+        project_id = request.query_params.get('project')
+        if project_id:
+            snapshots = snapshots.filter(project_id=project_id)
+        assignee_id = request.query_params.get('assigned_to')
+        if assignee_id:
+            snapshots = snapshots.filter(assigned_to_id=assignee_id)
+        return Response(trend_series(snapshots, start, end))
+
+    def parse_day(self, param):
+        value = self.request.query_params.get(param)
+        if not value:
+            return None
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        return day
+
+
+class ReportExportView(APIView):
+    replica_reads = True  # see tasks.routing
+    def get(self, request):
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            return Response({'error': 'output must be ndjson or csv'}, status=status.HTTP_400_BAD_REQUEST)
+        if request.user.role != 'supermanager':
+            return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+
+        projects = Project.objects.all()
+        project_id = request.query_params.get('project')
+        if project_id:
+            if not project_id.isdigit():
+                return Response({'error': 'project must be a project id'}, status=status.HTTP_400_BAD_REQUEST)
+            projects = projects.filter(id=project_id)
+        return export_project_progress(projects, output, served_over_asgi(request))
+class ManagerProjectViewSet(AtomicWritesMixin, ConditionalGetMixin, ActivityLogMixin, viewsets.ModelViewSet):
+    serializer_class = ManagerProjectSerializer
+    permission_classes = [IsAuthenticated, WriteRolePermission, ProjectScopePermission]
+    write_role = 'manager'
+    pagination_class = OptInCursorPagination
+
+    # Progress figures come from the rollup, which is touched whenever they change
+    validator_aggregates = {
+        'count': Count('pk'),
+        'updated_at': Max('updated_at'),
+        'stats_updated_at': Max('stats__updated_at'),
+    }
+
+    def get_manager_projects(self):
         if self.request.user.role == 'manager':
-            return Project.objects.filter(assigned_to=self.request.user)
+            return scoped_project_queryset(self.request.user)
         return Project.objects.none()
-# In views.py
-class ManagerTaskViewSet(viewsets.ModelViewSet):
-    serializer_class = TaskSerializer
-    permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        if self.request.user.role == 'manager':
-            project_id = self.request.query_params.get('project')
-            
-            # If project ID is provided, verify it belongs to this manager
-            if project_id:
-                if not Project.objects.filter(
-                    id=project_id, 
-                    assigned_to=self.request.user
-                ).exists():
-                    return Task.objects.none()
-                return Task.objects.filter(project_id=project_id)
-            
-            # If no project specified, return all tasks for manager's projects
-            manager_projects = Project.objects.filter(assigned_to=self.request.user)
-            return Task.objects.filter(project__in=manager_projects)
-        return Task.objects.none()
+        # Task counts are computed in the same query that loads the projects
+        return annotate_project_progress(self.get_manager_projects())
+
+    def get_validator_queryset(self):
+        return self.filter_queryset(self.get_manager_projects())
+# In views.py
+class ManagerTaskViewSet(RoleScopedTaskViewSet):
+    # Tasks in projects assigned to this manager; ?project= must be one of them
+    scope_role = 'manager'
 # class ManagerTaskViewSet(viewsets.ModelViewSet):
 #     serializer_class = TaskSerializer
 #     permission_classes = [IsAuthenticated]
@@ -349,7 +475,8 @@ class ManagerTaskViewSet(viewsets.ModelViewSet):
 #     def perform_create(self, serializer):
 #         serializer.save(assigned_by=self.request.user)
 
-class ManagerEmployeeListView(generics.ListAPIView):
+class ManagerEmployeeListView(ConditionalGetMixin, generics.ListAPIView):
+    replica_reads = True  # see tasks.routing
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
 
@@ -359,37 +486,24 @@ class ManagerEmployeeListView(generics.ListAPIView):
         return CustomUser.objects.none()
 class ManagerDashboardStats(APIView):
     permission_classes = [IsAuthenticated]
+    replica_reads = True  # see tasks.routing
 
     def get(self, request):
         if request.user.role != 'manager':
             return Response({'error': 'Unauthorized'}, status=403)
 
-        projects = Project.objects.filter(assigned_to=request.user)
-        project_ids = projects.values_list('id', flat=True)
-        tasks = Task.objects.filter(project__in=project_ids)
-
-        stats = {
-            'total_projects': projects.count(),
-            'active_projects': projects.filter(deadline__gte=timezone.now()).count(),
-            'pending_tasks': tasks.filter(status='pending').count(),
-            'in_progress_tasks': tasks.filter(status='in_progress').count(),
-            'completed_tasks': tasks.filter(status='completed').count(),
-            'overdue_tasks': tasks.filter(
-                Q(due_date__lt=timezone.now().date()) & ~Q(status='completed')
-            ).count()
-        }
-
-        return Response(stats)
+        return Response(manager_stats(request.user))
 # views.py
-class EmployeeTaskViewSet(viewsets.ModelViewSet):
-    serializer_class = TaskSerializer
-    permission_classes = [IsAuthenticated]
+class EmployeeTaskViewSet(RoleScopedTaskViewSet):
+    scope_role = 'employee'
 
-    def get_queryset(self):
-        if self.request.user.role == 'employee':
-            return Task.objects.filter(assigned_to=self.request.user)
-        return Task.objects.none()
+    def check_project_scope(self, serializer):
+        # An employee's scope is the projects they have tasks in, so it can't
+        # gate their own tasks: filing one is what adds its project. That is
+        # safe only because scope grants reads; every write endpoint checks
+        # the role (WriteRolePermission), and this one only reaches own tasks
+        pass
 
     def perform_create(self, serializer):
         # Employees shouldn't be able to assign tasks to others
-        serializer.save(assigned_to=self.request.user)
+        serializer.save(assigned_to=request_user_instance(self.request))
\ No newline at end of file